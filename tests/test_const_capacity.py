@@ -0,0 +1,84 @@
+import pyomo.environ as pyomo
+from urbs.features.storage import def_storage_capacity_rule, \
+    def_storage_power_rule, def_storage_energy_power_ratio_rule
+from urbs.features.transmission import def_transmission_capacity_rule, \
+    res_transmission_symmetry_rule
+
+
+def transmission_model(const_cap):
+    """Two directions of a line A-B and of a line A-C; A-B is
+    non-expandable (inst-cap == cap-up), A-C is expandable."""
+    m = pyomo.ConcreteModel()
+    m.mode = {'int': False}
+    m.stf = pyomo.Set(initialize=[2025])
+    tuples = [(2025, 'A', 'B', 'cable', 'electricity'),
+              (2025, 'B', 'A', 'cable', 'electricity'),
+              (2025, 'A', 'C', 'cable', 'electricity'),
+              (2025, 'C', 'A', 'cable', 'electricity')]
+    m.tra_tuples = pyomo.Set(initialize=tuples, dimen=5)
+    m.tra_const_cap_tuples = pyomo.Set(initialize=const_cap, dimen=5)
+    m.transmission_dict = {'inst-cap': {t: 100 for t in tuples}}
+    m.tra_decom_cap_dict = {}
+    m.cap_tra_new = pyomo.Var(m.tra_tuples, within=pyomo.NonNegativeReals)
+    m.cap_tra = pyomo.Expression(m.tra_tuples,
+                                 rule=def_transmission_capacity_rule)
+    return m
+
+
+def test_symmetry_of_non_expandable_line_is_skipped():
+    m = transmission_model([(2025, 'A', 'B', 'cable', 'electricity'),
+                            (2025, 'B', 'A', 'cable', 'electricity')])
+    m.res_transmission_symmetry = pyomo.Constraint(
+        m.tra_tuples, rule=res_transmission_symmetry_rule)
+
+    assert sorted(m.res_transmission_symmetry.keys()) == [
+        (2025, 'A', 'C', 'cable', 'electricity'),
+        (2025, 'C', 'A', 'cable', 'electricity')]
+
+
+def test_symmetry_of_one_constant_direction_is_kept():
+    m = transmission_model([(2025, 'A', 'B', 'cable', 'electricity')])
+    m.res_transmission_symmetry = pyomo.Constraint(
+        m.tra_tuples, rule=res_transmission_symmetry_rule)
+
+    assert len(m.res_transmission_symmetry) == 4
+
+
+def storage_model(const_c, const_p):
+    m = pyomo.ConcreteModel()
+    m.mode = {'int': False}
+    m.stf = pyomo.Set(initialize=[2025])
+    tuples = [(2025, 'A', 'battery', 'electricity'),
+              (2025, 'B', 'battery', 'electricity')]
+    m.sto_tuples = pyomo.Set(initialize=tuples, dimen=4)
+    m.sto_const_cap_c_tuples = pyomo.Set(initialize=const_c, dimen=4)
+    m.sto_const_cap_p_tuples = pyomo.Set(initialize=const_p, dimen=4)
+    m.storage_dict = {'inst-cap-c': {t: 10 for t in tuples},
+                      'inst-cap-p': {t: 5 for t in tuples},
+                      'ep-ratio': {t: 2 for t in tuples}}
+    m.sto_decom_cap_dict = {}
+    m.cap_sto_c_new = pyomo.Var(m.sto_tuples, within=pyomo.NonNegativeReals)
+    m.cap_sto_p_new = pyomo.Var(m.sto_tuples, within=pyomo.NonNegativeReals)
+    m.cap_sto_c = pyomo.Expression(m.sto_tuples,
+                                   rule=def_storage_capacity_rule)
+    m.cap_sto_p = pyomo.Expression(m.sto_tuples, rule=def_storage_power_rule)
+    return m
+
+
+def test_ep_ratio_of_fixed_storage_is_skipped():
+    fixed = [(2025, 'A', 'battery', 'electricity')]
+    m = storage_model(const_c=fixed, const_p=fixed)
+    m.def_storage_energy_power_ratio = pyomo.Constraint(
+        m.sto_tuples, rule=def_storage_energy_power_ratio_rule)
+
+    assert list(m.def_storage_energy_power_ratio.keys()) == [
+        (2025, 'B', 'battery', 'electricity')]
+
+
+def test_ep_ratio_with_expandable_power_is_kept():
+    m = storage_model(const_c=[(2025, 'A', 'battery', 'electricity')],
+                      const_p=[])
+    m.def_storage_energy_power_ratio = pyomo.Constraint(
+        m.sto_tuples, rule=def_storage_energy_power_ratio_rule)
+
+    assert len(m.def_storage_energy_power_ratio) == 2
@@ -0,0 +1,41 @@
+import pytest
+import pyomo.environ as pyomo
+from urbs.persistent import PersistentModel
+
+optim = pyomo.SolverFactory('appsi_highs')
+pytestmark = pytest.mark.skipif(not optim.available(exception_flag=False),
+                                reason='HiGHS is not installed')
+
+
+def lazy_model():
+    """LP with an indexed row set that grows between solves (like the lazy
+    line loading rows) and a mutable price (like the sweep Params)."""
+    m = pyomo.ConcreteModel()
+    m.price = pyomo.Param(initialize=1.0, mutable=True)
+    m.x = pyomo.Var(within=pyomo.NonNegativeReals)
+    m.y = pyomo.Var(within=pyomo.NonNegativeReals)
+    m.demand = pyomo.Constraint(expr=m.x + m.y >= 10)
+    m.lazy = pyomo.Set(initialize=[], dimen=1)
+    m.cut = pyomo.Constraint(m.lazy, rule=lambda m, i: m.x <= i)
+    m.cost = pyomo.Objective(expr=m.price * m.x + 2 * m.y)
+    return m
+
+
+def test_added_rows_and_params_are_pushed():
+    m = lazy_model()
+    persistent = PersistentModel(optim, m)
+
+    persistent.solve()
+    assert pyomo.value(m.x) == pytest.approx(10)
+
+    m.lazy.add(4)
+    m.cut[4] = m.x <= 4
+    persistent.add_rows([m.cut[4]])
+    persistent.solve()
+    assert pyomo.value(m.x) == pytest.approx(4)
+    assert pyomo.value(m.y) == pytest.approx(6)
+
+    m.price = 3
+    persistent.solve()
+    assert pyomo.value(m.x) == pytest.approx(0)
+    assert pyomo.value(m.y) == pytest.approx(10)
@@ -0,0 +1,25 @@
+import pyomo.environ as pyomo
+from urbs.profiler import BuildProfiler
+
+
+def test_rule_calls_are_counted():
+    calls = []
+
+    def rule(m, i):
+        calls.append(i)
+        return pyomo.Constraint.Skip if i == 2 else m.x[i] <= 1
+
+    with BuildProfiler() as profiler:
+        m = pyomo.ConcreteModel()
+        m.sites = pyomo.Set(initialize=[1, 2, 3])
+        m.x = pyomo.Var(m.sites)
+        m.row = pyomo.Constraint(m.sites, rule=rule)
+        m.cost = pyomo.Objective(expr=m.x[1])
+    records = profiler.records
+
+    assert records['row']['rule_calls'] == len(calls) == 3
+    assert (records['row']['created'], records['row']['skipped']) == (2, 1)
+    assert records['x']['rule_calls'] == 0
+    assert records['cost']['rule_calls'] == 0
+    # the rule is unwrapped after the construction
+    assert m.row.rule._fcn is rule
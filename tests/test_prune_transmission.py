@@ -0,0 +1,37 @@
+import pandas as pd
+from urbs.input import prune_dominated_transmission
+
+LEVELS = ['support_timeframe', 'Site In', 'Site Out', 'Transmission',
+          'Commodity']
+
+
+def transmission_data(options):
+    """Input data dict with the options {name: (inv-cost, fix-cost)} of the
+    line section A-B, equal in everything else."""
+    index = pd.MultiIndex.from_tuples(
+        [(2025, 'A', 'B', name, 'electricity') for name in options],
+        names=LEVELS)
+    transmission = pd.DataFrame({
+        'inv-cost': [inv for inv, _ in options.values()],
+        'fix-cost': [fix for _, fix in options.values()],
+        'var-cost': 0.0, 'eff': 1.0, 'tra-block': 100.0, 'cap-up': 100.0,
+        'resistance': 0.1, 'reactance': 0.05, 'wacc': 0.05,
+        'depreciation': 40, 'inst-cap': 0.0, 'cap-lo': 0.0,
+        'decom-saving': float('nan')}, index=index)
+    return {'transmission': transmission}
+
+
+def test_cheaper_option_dominates():
+    data = transmission_data({'cable_a': (100, 10), 'cable_b': (90, 10)})
+    dropped = prune_dominated_transmission(data)
+
+    assert [index[3] for index, _ in dropped] == ['cable_a']
+    assert list(data['transmission'].index.get_level_values(3)) == ['cable_b']
+
+
+def test_investment_and_fixed_costs_are_not_added():
+    # one-off investment against annual fixed costs: neither dominates
+    data = transmission_data({'cable_a': (100, 0), 'cable_b': (0, 90)})
+
+    assert prune_dominated_transmission(data) == []
+    assert len(data['transmission']) == 2
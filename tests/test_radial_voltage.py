@@ -0,0 +1,65 @@
+import pyomo.environ as pyomo
+from pyomo.repn import generate_standard_repn
+from urbs.features.transmission import add_ac_voltage
+
+# feeder R - A - B - C with a house behind each of A, B and C, two cable
+# options per line section
+SECTIONS = [('R', 'A'), ('A', 'B'), ('B', 'C'),
+            ('A', 'h1'), ('B', 'h2'), ('C', 'h3')]
+CABLES = ['cable_1', 'cable_2']
+
+
+def feeder_model(radial):
+    m = pyomo.ConcreteModel()
+    m.mode = {'radial': radial, 'lazy_voltage': False}
+    m.tm = pyomo.Set(initialize=[1])
+    m.stf = pyomo.Set(initialize=[2025])
+    sites = ['R', 'A', 'B', 'C', 'h1', 'h2', 'h3']
+    m.sit = pyomo.Set(initialize=sites)
+    m.sit_tuples_ac = pyomo.Set(initialize=[(2025, sit) for sit in sites],
+                                dimen=2)
+    m.sit_slackbus = pyomo.Set(initialize=[(2025, 'R')], dimen=2)
+    m.sites_ac = pyomo.Set(
+        initialize=[(2025, sin, sout) for sin, sout in SECTIONS], dimen=3)
+    lines = [(2025, sin, sout, tra, 'electricity')
+             for sin, sout in SECTIONS for tra in CABLES]
+    m.tra_tuples_ac = pyomo.Set(initialize=lines, dimen=5)
+    m.tra_topology_ac = {'parallel': {
+        (2025, sin, sout, 'electricity'): CABLES for sin, sout in SECTIONS}}
+    m.transmission_dict = {'resistance': {line: 0.2 for line in lines},
+                           'reactance': {line: 0.1 for line in lines}}
+    m.site_dict = {'base-voltage': {sit: 0.4 for sit in m.sit_tuples_ac},
+                   'min-voltage': {sit: 0.9 for sit in m.sit_tuples_ac},
+                   'max-voltage': {sit: 1.1 for sit in m.sit_tuples_ac}}
+    m.e_tra_in = pyomo.Var(m.tm, m.tra_tuples_ac)
+    m.e_tra_q_in = pyomo.Var(m.tm, m.tra_tuples_ac)
+    return add_ac_voltage(m)
+
+
+def size(m):
+    """Rows and nonzeros of the voltage rows and the voltage^2 variables."""
+    rows = list(m.component_data_objects(pyomo.Constraint, active=True))
+    nonzeros = sum(len(generate_standard_repn(row.body).linear_vars)
+                   for row in rows)
+    voltages = len(m.voltage_squared_anchor if m.mode['radial']
+                   else m.voltage_squared)
+    return len(rows), nonzeros, voltages
+
+
+def test_radial_has_fewer_nonzeros_than_lindistflow():
+    meshed, radial = size(feeder_model(False)), size(feeder_model(True))
+
+    # LinDistFlow: 6 rows of 2 voltages + 2 * 2 flows, 7 voltages
+    assert meshed == (6, 36, 7)
+    # 3 rows between the anchors R, A, B, C and 3 band rows of the houses
+    # with one voltage and the drop of their line section
+    assert radial == (6, 3 * 6 + 3 * 5, 4)
+
+
+def test_feeder_end_is_expressed_by_its_parent():
+    m = feeder_model(True)
+
+    assert m.voltage_paths[(2025, 'h3')] == \
+        ((2025, 'C'), ((2025, 'C', 'h3', -1),))
+    assert sorted(m.sites_ac_anchor) == [
+        (2025, 'A', 'B'), (2025, 'B', 'C'), (2025, 'R', 'A')]
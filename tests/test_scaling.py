@@ -0,0 +1,47 @@
+import pytest
+import pyomo.environ as pyomo
+from urbs.scaling import ScaledModel
+
+optim = pyomo.SolverFactory('appsi_highs')
+pytestmark = pytest.mark.skipif(not optim.available(exception_flag=False),
+                                reason='HiGHS is not installed')
+
+
+def lazy_model():
+    """Badly scaled LP with an indexed row set that grows between solves
+    (like the lazy line loading rows) and a mutable price (like the sweep
+    Params)."""
+    m = pyomo.ConcreteModel()
+    m.price = pyomo.Param(initialize=1.0, mutable=True)
+    m.x = pyomo.Var(within=pyomo.NonNegativeReals)
+    m.y = pyomo.Var(within=pyomo.NonNegativeReals, bounds=(0, 1e4))
+    m.demand = pyomo.Constraint(expr=1e3 * m.x + 0.01 * m.y >= 50)
+    m.lazy = pyomo.Set(initialize=[], dimen=1)
+    m.cut = pyomo.Constraint(m.lazy, rule=lambda m, i: m.x <= 0.01 * i)
+    m.cost = pyomo.Objective(expr=m.price * m.x + 0.002 * m.y)
+    return m
+
+
+def test_re_solve_reuses_scaled_copy():
+    m = lazy_model()
+    scaled = ScaledModel(optim, m)
+    copy = scaled.scaled
+
+    scaled.solve()
+    assert pyomo.value(m.x) == pytest.approx(0.05)
+
+    # lazy row added to the original model
+    m.lazy.add(2)
+    m.cut[2] = m.x <= 0.01 * 2
+    scaled.solve()
+    assert scaled.scaled is copy
+    assert pyomo.value(m.x) == pytest.approx(0.02)
+    assert pyomo.value(m.y) == pytest.approx(3000)
+
+    # changed Param and variable bound
+    m.price = 1e3
+    m.y.setub(4000)
+    scaled.solve()
+    assert pyomo.value(m.x) == pytest.approx(0.01)
+    assert pyomo.value(m.y) == pytest.approx(4000)
+    assert pyomo.value(m.cost) == pytest.approx(18)
@@ -12,6 +12,9 @@ commodities.
 
 from .colorcodes import COLORS
 from .model import create_model
+from .scaling import scale_model, unscale_solution, ScaledModel
+from .profiler import BuildProfiler
+from .persistent import PersistentModel, persistent_solver_name
 from .input import *
 from .validation import validate_input
 from .output import get_constants, get_timeseries
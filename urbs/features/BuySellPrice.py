@@ -1,7 +1,7 @@
 
 import math
 import pyomo.core as pyomo
-from .modelhelper import commodity_subset
+from .modelhelper import commodity_subset, timestep_weights, is_zero
 
 def add_buy_sell_price(m):
 
@@ -16,32 +16,40 @@ def add_buy_sell_price(m):
         initialize=commodity_subset(m.com_tuples, 'Buy'),
         ordered=False,
         doc='Commodities that can be purchased')
+    m.com_sell_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.com * m.com_type,
+        initialize=[c for c in m.com_tuples if c[2] in m.com_sell],
+        doc='Combinations of sell commodities, e.g. (2020,Mid,Elec sell,Sell)')
+    m.com_buy_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.com * m.com_type,
+        initialize=[c for c in m.com_tuples if c[2] in m.com_buy],
+        doc='Combinations of buy commodities, e.g. (2020,Mid,Elec buy,Buy)')
 
     # Variables
     m.e_co_sell = pyomo.Var(
-        m.tm, m.com_tuples,
+        m.tm, m.com_sell_tuples,
         within=pyomo.NonNegativeReals,
         doc='Use of sell commodity source (MW) per timestep')
     m.e_co_buy = pyomo.Var(
-        m.tm, m.com_tuples,
+        m.tm, m.com_buy_tuples,
         within=pyomo.NonNegativeReals,
         doc='Use of buy commodity source (MW) per timestep')
 
     # Rules
     m.res_sell_step = pyomo.Constraint(
-        m.tm, m.com_tuples,
+        m.tm, m.com_sell_tuples,
         rule=res_sell_step_rule,
         doc='sell commodity output per step <= commodity.maxperstep')
     m.res_sell_total = pyomo.Constraint(
-        m.com_tuples,
+        m.com_sell_tuples,
         rule=res_sell_total_rule,
         doc='total sell commodity output <= commodity.max')
     m.res_buy_step = pyomo.Constraint(
-        m.tm, m.com_tuples,
+        m.tm, m.com_buy_tuples,
         rule=res_buy_step_rule,
         doc='buy commodity output per step <= commodity.maxperstep')
     m.res_buy_total = pyomo.Constraint(
-        m.com_tuples,
+        m.com_buy_tuples,
         rule=res_buy_total_rule,
         doc='total buy commodity output <= commodity.max')
 
@@ -57,54 +65,40 @@ def add_buy_sell_price(m):
 
 # limit sell commodity use per time step
 def res_sell_step_rule(m, tm, stf, sit, com, com_type):
-    if com not in m.com_sell:
-        return pyomo.Constraint.Skip
-    else:
-        return (m.e_co_sell[tm, stf, sit, com, com_type] <=
-                m.dt * m.commodity_dict['maxperhour']
-                [(stf, sit, com, com_type)])
+    return (m.e_co_sell[tm, stf, sit, com, com_type] <=
+            m.dt * m.commodity_dict['maxperhour']
+            [(stf, sit, com, com_type)])
 
 
 # limit sell commodity use in total (scaled to annual consumption, thanks
 # to m.weight)
 def res_sell_total_rule(m, stf, sit, com, com_type):
-    if com not in m.com_sell:
-        return pyomo.Constraint.Skip
-    else:
-        # calculate total sale of commodity com
-        total_consumption = 0
-        for tm in m.tm:
-            total_consumption += (
-                m.e_co_sell[tm, stf, sit, com, com_type] * m.typeperiod['weight_typeperiod'][(stf,tm)])
-        total_consumption *= m.weight
-        return (total_consumption <=
-                m.commodity_dict['max'][(stf, sit, com, com_type)])
+    # calculate total sale of commodity com
+    weights = timestep_weights(m, stf)
+    total_consumption = pyomo.quicksum(
+        m.e_co_sell[tm, stf, sit, com, com_type] * weights[tm]
+        for tm in m.tm if weights[tm] != 0)
+    return (total_consumption <=
+            m.commodity_dict['max'][(stf, sit, com, com_type)])
 
 
 # limit buy commodity use per time step
 def res_buy_step_rule(m, tm, stf, sit, com, com_type):
-    if com not in m.com_buy:
-        return pyomo.Constraint.Skip
-    else:
-        return (m.e_co_buy[tm, stf, sit, com, com_type] <=
-                m.dt * m.commodity_dict['maxperhour']
-                [(stf, sit, com, com_type)])
+    return (m.e_co_buy[tm, stf, sit, com, com_type] <=
+            m.dt * m.commodity_dict['maxperhour']
+            [(stf, sit, com, com_type)])
 
 
 # limit buy commodity use in total (scaled to annual consumption, thanks
 # to m.weight)
 def res_buy_total_rule(m, stf, sit, com, com_type):
-    if com not in m.com_buy:
-        return pyomo.Constraint.Skip
-    else:
-        # calculate total sale of commodity com
-        total_consumption = 0
-        for tm in m.tm:
-            total_consumption += (
-                m.e_co_buy[tm, stf, sit, com, com_type] * m.typeperiod['weight_typeperiod'][(stf,tm)])
-        total_consumption *= m.weight
-        return (total_consumption <=
-                m.commodity_dict['max'][(stf, sit, com, com_type)])
+    # calculate total sale of commodity com
+    weights = timestep_weights(m, stf)
+    total_consumption = pyomo.quicksum(
+        m.e_co_buy[tm, stf, sit, com, com_type] * weights[tm]
+        for tm in m.tm if weights[tm] != 0)
+    return (total_consumption <=
+            m.commodity_dict['max'][(stf, sit, com, com_type)])
 
 
 # power connection capacity: Sell == Buy
@@ -171,59 +165,50 @@ def bsp_surplus(m, tm, stf, sit, com, com_type):
     return power_surplus
 
 
-def revenue_costs(m):
-    sell_tuples = commodity_subset(m.com_tuples, m.com_sell)
+def buy_sell_price(m, c, prices=None):
+    """Buy/sell price timeseries of commodity tuple c.
+    The price columns may be keyed by commodity, by (commodity,) or by
+    (site, commodity), depending on the input sheet. Models built with
+    sweep=True read the mutable m.buy_sell_price_ts instead.
+    Args:
+        m: the model object
+        c: (stf, sit, com, com_type) tuple
+        prices: buy_sell_price dict, default: m.buy_sell_price_dict
+    Returns:
+        dict mapping (stf, tm) to the price
+    """
+    if prices is None:
+        if hasattr(m, 'buy_sell_price_ts'):
+            return {(c[0], tm): m.buy_sell_price_ts[(tm,) + c]
+                    for tm in m.tm}
+        prices = m.buy_sell_price_dict
     try:
-        return -sum(
-            m.e_co_sell[(tm,) + c] *
-            m.buy_sell_price_dict[c[2]][(c[0], tm)] * m.weight *  m.typeperiod['weight_typeperiod'][(m.stf_list[0],tm)] *
-            m.commodity_dict['price'][c] *
-            m.commodity_dict['cost_factor'][c]
-            for tm in m.tm
-            for c in sell_tuples)
+        return prices[c[2]]
     except KeyError:
         try:
-            return -sum(
-                m.e_co_sell[(tm,) + c] *
-                m.buy_sell_price_dict[c[2], ][(c[0], tm)] * m.weight *  m.typeperiod['weight_typeperiod'][(m.stf_list[0],tm)] *
-                m.commodity_dict['price'][c] *
-                m.commodity_dict['cost_factor'][c]
-                for tm in m.tm
-                for c in sell_tuples)
+            return prices[c[2], ]
         except KeyError:
-            return -sum(
-                m.e_co_sell[(tm,) + c] *
-                m.buy_sell_price_dict[c[1], c[2]][(c[0], tm)] * m.weight *  m.typeperiod['weight_typeperiod'][(m.stf_list[0],tm)] *
-                m.commodity_dict['price'][c] *
-                m.commodity_dict['cost_factor'][c]
-                for tm in m.tm
-                for c in sell_tuples)
+            return prices[c[1], c[2]]
 
-def purchase_costs(m):
-    buy_tuples = commodity_subset(m.com_tuples, m.com_buy)
-    try:
-        return sum(
-            m.e_co_buy[(tm,) + c] *
-            m.buy_sell_price_dict[c[2]][(c[0], tm)] * m.weight *  m.typeperiod['weight_typeperiod'][(m.stf_list[0],tm)] *
-            m.commodity_dict['price'][c] *
-            m.commodity_dict['cost_factor'][c]
-            for tm in m.tm
-            for c in buy_tuples)
-    except KeyError:
-        try:
-            return sum(
-                m.e_co_buy[(tm,) + c] *
-                m.buy_sell_price_dict[c[2], ][(c[0], tm)] * m.weight *  m.typeperiod['weight_typeperiod'][(m.stf_list[0],tm)] *
-                m.commodity_dict['price'][c] *
-                m.commodity_dict['cost_factor'][c]
-                for tm in m.tm
-                for c in buy_tuples)
-        except KeyError:
-            return sum(
-                m.e_co_buy[(tm,) + c] *
-                m.buy_sell_price_dict[c[1],c[2]][(c[0], tm)] * m.weight *  m.typeperiod['weight_typeperiod'][(m.stf_list[0],tm)] *
-                m.commodity_dict['price'][c] *
-                m.commodity_dict['cost_factor'][c]
-                for tm in m.tm
-                for c in buy_tuples)
 
+def buy_sell_costs(m, var, tuples):
+    # weighted sum of var * price timeseries * commodity price factor
+    weights = timestep_weights(m, m.stf_list[0])
+    terms = []
+    for c in tuples:
+        factor = m.commodity_dict['price'][c] * m.commodity_dict['cost_factor'][c]
+        if is_zero(factor):
+            continue
+        price = buy_sell_price(m, c)
+        terms.extend(var[(tm,) + c] * (price[(c[0], tm)] * factor * weights[tm])
+                     for tm in m.tm
+                     if weights[tm] != 0 and not is_zero(price[(c[0], tm)]))
+    return pyomo.quicksum(terms)
+
+
+def revenue_costs(m):
+    return -buy_sell_costs(m, m.e_co_sell, m.com_sell_tuples)
+
+
+def purchase_costs(m):
+    return buy_sell_costs(m, m.e_co_buy, m.com_buy_tuples)
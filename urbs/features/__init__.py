@@ -7,10 +7,14 @@
 """
 
 from .transmission import add_transmission, add_transmission_dc, \
-                          transmission_balance, transmission_cost
+                          transmission_balance, transmission_cost, \
+                          line_loading_violations, add_line_loading_rows, \
+                          voltage_band_violations, add_voltage_band
 from .storage import add_storage, storage_balance, storage_cost
 from .BuySellPrice import add_buy_sell_price, bsp_surplus, revenue_costs, \
                           purchase_costs
 from .AdvancedProcesses import add_advanced_processes
+from .sweep import add_sweep_parameters, add_sweep_prices, \
+                    restore_sweep_values, update_sweep_parameters
 from .typeperiod import *
 from .lvdshelper import *
@@ -234,25 +234,6 @@ def adopt_variable_tariffs(data, vartariff_nodes):
     return data_hp_react
 
 
-### Model new imaginary lines to enable reactive power flow on respective lines with defined resistance
-def add_reactive_transmission_lines(microgrid_data_input):
-    ### copy transmission lines with resistance to model transmission lines for reactive power flows
-    reactive_transmission_lines = microgrid_data_input['transmission'][
-        microgrid_data_input['transmission'].index.get_level_values(4) == 'electricity'][
-        ~microgrid_data_input['transmission'].loc[:, 'resistance'].isna()]
-    reactive_transmission_lines = reactive_transmission_lines.copy(deep=True)
-    reactive_transmission_lines.rename(index={'electricity': 'electricity-reactive'}, level=4, inplace=True)
-    ### set costs to zero as lines are not really built -
-
-    reactive_transmission_lines.loc[:, ['inv-cost', 'fix-cost', 'var-cost', 'decom-saving']] *= 0
-    ### set tra-block to NaN for reactive lines as they shouldn't have block constraints
-    #reactive_transmission_lines.loc[:, 'tra-block'] = float('nan')
-    ### concat new line data
-    microgrid_data_input['transmission'] = pd.concat(
-        [microgrid_data_input['transmission'], reactive_transmission_lines], sort=True)
-    return microgrid_data_input
-
-
 ### Implement reactive power outputs as commodity according to predefined power factors for processes
 def add_reactive_output_ratios(microgrid_data_input):
     pro_Q = microgrid_data_input['process'][microgrid_data_input['process'].loc[:, 'pf-min'] > 0]
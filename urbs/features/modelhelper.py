@@ -1,4 +1,6 @@
 import sys
+import pyomo.environ as pyomo
+from pyomo.core.expr.numvalue import is_constant
 from .transmission import transmission_balance
 from .storage import storage_balance
 
@@ -114,6 +116,64 @@ def effective_distance(dist, m):
 
 
 
+def add_timestep_weights(m):
+    """Precompute the per-timestep weight of costs and emissions,
+    m.weight * weight_typeperiod, once per support timeframe into
+    m.timestep_weights. Call after add_typeperiod, which changes m.weight.
+    Args:
+        m: the model object
+    Returns:
+        m
+    """
+    weight = pyomo.value(m.weight)
+    m.timestep_weights = {
+        stf: {tm: weight * m.typeperiod['weight_typeperiod'][(stf, tm)]
+              for tm in m.tm}
+        for stf in m.stf}
+    return m
+
+
+def timestep_weights(m, stf):
+    """Per-timestep weight of costs and emissions, c.f.
+    add_timestep_weights.
+    Args:
+        m: the model object
+        stf: the support timeframe of the type period weights
+    Returns:
+        dict mapping tm to its weight
+    """
+    return m.timestep_weights[stf]
+
+
+def is_zero(coefficient):
+    """True for a constant zero coefficient. Coefficients with mutable
+    Params (create_model(sweep=True)) are never zero, their value may
+    change after the model is built.
+    """
+    return is_constant(coefficient) and pyomo.value(coefficient) == 0
+
+
+def weighted_timestep_sum(m, var, tuples, coefficient, weights):
+    """Linear sum of var[tm, tuple] * coefficient[tuple] * weights[tm].
+    Built with quicksum; tuples with a zero coefficient and timesteps with
+    a zero weight are skipped instead of adding zero terms.
+    Args:
+        m: the model object
+        var: indexed variable (or expression) over m.tm x tuples
+        tuples: index tuples without the timestep
+        coefficient: dict (or function) of the constant factor per tuple
+        weights: dict of the weight per timestep, see timestep_weights
+    Returns:
+        linear expression
+    """
+    if not callable(coefficient):
+        coefficient = coefficient.__getitem__
+    terms = [(t, coefficient(t)) for t in tuples]
+    return pyomo.quicksum(var[(tm,) + t] * (c * weights[tm])
+                          for t, c in terms if not is_zero(c)
+                          for tm in m.tm if weights[tm] != 0)
+
+
 def commodity_balance(m, tm, stf, sit, com):
     """Calculate commodity balance at given timestep.
     For a given commodity co and timestep tm, calculate the balance of
@@ -129,16 +189,12 @@ def commodity_balance(m, tm, stf, sit, com):
     Returns
         balance: net value of consumed (positive) or provided (negative) power
     """
-    balance = (sum(m.e_pro_in[(tm, stframe, site, process, com)]
+    balance = (sum(m.e_pro_in[(tm, stf, sit, process, com)]
                    # usage as input for process increases balance
-                   for stframe, site, process in m.pro_tuples
-                   if site == sit and stframe == stf and
-                   (stframe, process, com) in m.r_in_dict) -
-               sum(m.e_pro_out[(tm, stframe, site, process, com)]
+                   for process in m.pro_in_incidence.get((stf, sit, com), ())) -
+               sum(m.e_pro_out[(tm, stf, sit, process, com)]
                    # output from processes decreases balance
-                   for stframe, site, process in m.pro_tuples
-                   if site == sit and stframe == stf and
-                   (stframe, process, com) in m.r_out_dict))
+                   for process in m.pro_out_incidence.get((stf, sit, com), ())))
     if m.mode['tra']:
         balance += transmission_balance(m, tm, stf, sit, com)
     if m.mode['sto']:
@@ -146,6 +202,43 @@ def commodity_balance(m, tm, stf, sit, com):
 
     return balance
 
+
+def process_incidence(pro_io_tuples):
+    """Incidence index of processes by site and commodity.
+    Groups process input or output tuples by (stf, sit, com), so that the
+    vertex balance only visits the processes actually connected to a
+    commodity at a site instead of scanning all process tuples.
+    Args:
+        pro_io_tuples: (stf, sit, pro, com) tuples, e.g. m.pro_input_tuples
+    Returns:
+        dict mapping (stf, sit, com) to the list of connected processes
+    """
+    incidence = {}
+    for (stf, sit, pro, com) in pro_io_tuples:
+        incidence.setdefault((stf, sit, com), []).append(pro)
+    return incidence
+
+
+def const_capacity_tuples(m, tuples, const_cap_dict, decom_cap_dict=()):
+    """Tuples whose total capacity is fixed to the installed capacity.
+    These have inst-cap == cap-up and cannot be decommissioned, so their
+    capacity expression is a constant and their flows are limited by
+    variable bounds instead of per-timestep capacity constraints.
+    Intertemporal models keep the capacity expressions for all tuples.
+    Args:
+        m: a Pyomo ConcreteModel m
+        tuples: capacity index tuples, e.g. m.pro_tuples
+        const_cap_dict: installed capacities of non-expandable tuples
+        decom_cap_dict: tuples that can be decommissioned
+    Returns:
+        list of tuples with constant capacity
+    """
+    if m.mode['int']:
+        return []
+    return [t for t in tuples
+            if t in const_cap_dict and t not in decom_cap_dict]
+
+
 def calculate_injection(m, tm, stf, sit):
     """Calculate commodity balance at given timestep.
     For a given commodity co and timestep tm, calculate the balance of
@@ -164,14 +257,12 @@ def calculate_injection(m, tm, stf, sit):
 
     # Transmission injection calculations always applied for full co-optimization
     if m.mode['tra']:
-        injection = sum(m.e_tra_out[(tm,stframe,sitin,sitout,tra,com)]
-                        for (stframe,sitin,sitout,tra,com) in m.tra_tuples
-                        if sitout == sit and
-                        (com == 'electricity' or com == 'electricity_hp' or com == 'electricity_bev')) \
-                    -sum(m.e_tra_in[(tm,stframe,sitin,sitout,tra,com)]
-                        for (stframe,sitin,sitout,tra,com) in m.tra_tuples
-                        if sitin == sit and
-                        (com == 'electricity' or com == 'electricity_hp' or com == 'electricity_bev'))
+        injection = sum(m.e_tra_out[(tm,) + tra_tuple]
+                        for com in ('electricity', 'electricity_hp', 'electricity_bev')
+                        for tra_tuple in m.tra_topology['in'].get((stf, sit, com), ())) \
+                    -sum(m.e_tra_in[(tm,) + tra_tuple]
+                        for com in ('electricity', 'electricity_hp', 'electricity_bev')
+                        for tra_tuple in m.tra_topology['out'].get((stf, sit, com), ()))
     else:
         injection = 0
     return injection
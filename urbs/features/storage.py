@@ -19,6 +19,11 @@ def add_storage(m):
         initialize=tuple(m.storage_dict["eff-in"].keys()),
         doc='Combinations of possible storage by site,'
             'e.g. (2020,Mid,Bat,Elec)')
+    # lookup (stf, sit, com) -> storages, used by storage_balance
+    m.sto_incidence = {}
+    for (stf, sit, sto, com) in m.sto_tuples:
+        m.sto_incidence.setdefault((stf, sit, com), []).append(
+            (stf, sit, sto, com))
 
     # tuples for intertemporal operation
     if m.mode['int']:
@@ -65,6 +70,32 @@ def add_storage(m):
         initialize=tuple(m.sto_decom_cap_dict.keys()),
         doc='storages which can be decommissioned')
 
+    # storage tuples with constant size/power, limited by variable bounds
+    # imported here, modelhelper itself imports this module
+    from .modelhelper import const_capacity_tuples
+    m.sto_const_cap_c_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.sto * m.com,
+        initialize=const_capacity_tuples(m, m.sto_tuples,
+                                         m.sto_const_cap_c_dict,
+                                         m.sto_decom_cap_dict),
+        doc='storages with constant size (inst-cap-c == cap-up-c)')
+    m.sto_const_cap_p_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.sto * m.com,
+        initialize=const_capacity_tuples(m, m.sto_tuples,
+                                         m.sto_const_cap_p_dict,
+                                         m.sto_decom_cap_dict),
+        doc='storages with constant power (inst-cap-p == cap-up-p)')
+    m.sto_var_cap_c_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.sto * m.com,
+        initialize=[s for s in m.sto_tuples
+                    if s not in m.sto_const_cap_c_tuples],
+        doc='storages with variable size')
+    m.sto_var_cap_p_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.sto * m.com,
+        initialize=[s for s in m.sto_tuples
+                    if s not in m.sto_const_cap_p_tuples],
+        doc='storages with variable power')
+
 
     # Variables
     m.cap_sto_c_new = pyomo.Var(
@@ -92,6 +123,13 @@ def add_storage(m):
         within=pyomo.NonNegativeIntegers,
         doc='New storage power units')
 
+    # no new size/power for constant capacities, only the Invest cost uses
+    # their cap_sto_c_new/cap_sto_p_new (c.f. const_capacity_tuples)
+    for s in m.sto_const_cap_c_tuples:
+        m.cap_sto_c_new[s].fix(0)
+    for s in m.sto_const_cap_p_tuples:
+        m.cap_sto_p_new[s].fix(0)
+
     # storage capacities as expression objects
     m.cap_sto_c = pyomo.Expression(
         m.sto_tuples,
@@ -105,14 +143,17 @@ def add_storage(m):
     m.e_sto_in = pyomo.Var(
         m.tm, m.sto_tuples,
         within=pyomo.NonNegativeReals,
+        bounds=e_sto_power_bounds_rule,
         doc='Power flow into storage (MW) per timestep')
     m.e_sto_out = pyomo.Var(
         m.tm, m.sto_tuples,
         within=pyomo.NonNegativeReals,
+        bounds=e_sto_power_bounds_rule,
         doc='Power flow out of storage (MW) per timestep')
     m.e_sto_con = pyomo.Var(
         m.t, m.sto_tuples,
         within=pyomo.NonNegativeReals,
+        bounds=e_sto_con_bounds_rule,
         doc='Energy content of storage (MWh) in timestep')
 
     # storage rules
@@ -129,23 +170,23 @@ def add_storage(m):
         rule=def_storage_state_rule,
         doc='storage[t] = (1 - sd) * storage[t-1] + in * eff_i - out / eff_o')
     m.res_storage_input_by_power = pyomo.Constraint(
-        m.tm, m.sto_tuples,
+        m.tm, m.sto_var_cap_p_tuples,
         rule=res_storage_input_by_power_rule,
         doc='storage input <= storage power')
     m.res_storage_output_by_power = pyomo.Constraint(
-        m.tm, m.sto_tuples,
+        m.tm, m.sto_var_cap_p_tuples,
         rule=res_storage_output_by_power_rule,
         doc='storage output <= storage power')
     m.res_storage_state_by_capacity = pyomo.Constraint(
-        m.t, m.sto_tuples,
+        m.t, m.sto_var_cap_c_tuples,
         rule=res_storage_state_by_capacity_rule,
         doc='storage content <= storage capacity')
     m.res_storage_power = pyomo.Constraint(
-        m.sto_tuples,
+        m.sto_var_cap_p_tuples,
         rule=res_storage_power_rule,
         doc='storage.cap-lo-p <= storage power <= storage.cap-up-p')
     m.res_storage_capacity = pyomo.Constraint(
-        m.sto_tuples,
+        m.sto_var_cap_c_tuples,
         rule=res_storage_capacity_rule,
         doc='storage.cap-lo-c <= storage capacity <= storage.cap-up-c')
     m.def_initial_storage_state = pyomo.Constraint(
@@ -207,7 +248,7 @@ def def_storage_capacity_rule(m, stf, sit, sto, com):
                     - sum(m.cap_sto_c_decommissioned[stf_dec, sit, sto, com] for stf_dec in m.stf if stf_dec <= stf if
                           stf_dec > min(m.stf) if (stf_dec, sit, sto, com) in m.sto_decom_cap_dict))
     else:
-        if 0:  # (stf, sit, sto, com) in m.sto_const_cap_c_dict:
+        if (stf, sit, sto, com) in m.sto_const_cap_c_tuples:
             cap_sto_c = m.storage_dict['inst-cap-c'][(stf, sit, sto, com)]
         else:
             cap_sto_c = (m.cap_sto_c_new[stf, sit, sto, com] +
@@ -246,7 +287,7 @@ def def_storage_power_rule(m, stf, sit, sto, com):
                     - sum(m.cap_sto_p_decommissioned[stf_dec, sit, sto, com] for stf_dec in m.stf if stf_dec <= stf
                           if (stf_dec, sit, sto, com) in m.sto_decom_cap_dict))
     else:
-        if 0:  # (stf, sit, sto, com) in m.sto_const_cap_p_dict:
+        if (stf, sit, sto, com) in m.sto_const_cap_p_tuples:
             cap_sto_p = m.storage_dict['inst-cap-p'][(stf, sit, sto, com)]
         else:
             cap_sto_p = (m.cap_sto_p_new[stf, sit, sto, com] +
@@ -274,6 +315,21 @@ def def_new_cap_sto_p_rule(m, stf, sit, sto, com):
             m.sto_block_p_dict[stf, sit, sto, com])
 
 
+# storage input/output <= constant storage power as variable bound
+def e_sto_power_bounds_rule(m, t, stf, sit, sto, com):
+    if (stf, sit, sto, com) in m.sto_const_cap_p_tuples:
+        return (0, m.dt.value *
+                m.storage_dict['inst-cap-p'][(stf, sit, sto, com)])
+    return (0, None)
+
+
+# storage content <= constant storage capacity as variable bound
+def e_sto_con_bounds_rule(m, t, stf, sit, sto, com):
+    if (stf, sit, sto, com) in m.sto_const_cap_c_tuples:
+        return (0, m.storage_dict['inst-cap-c'][(stf, sit, sto, com)])
+    return (0, None)
+
+
 # storage input <= storage power
 def res_storage_input_by_power_rule(m, t, stf, sit, sto, com):
     return (m.e_sto_in[t, stf, sit, sto, com] <= m.dt *
@@ -321,6 +377,10 @@ def res_storage_state_cyclicity_rule(m, stf, sit, sto, com):
 
 
 def def_storage_energy_power_ratio_rule(m, stf, sit, sto, com):
+    # constant capacity and power: no variable left in the row
+    if ((stf, sit, sto, com) in m.sto_const_cap_c_tuples and
+            (stf, sit, sto, com) in m.sto_const_cap_p_tuples):
+        return pyomo.Constraint.Skip
     return (m.cap_sto_c[stf, sit, sto, com] == m.cap_sto_p[stf, sit, sto, com] *
             m.storage_dict['ep-ratio'][(stf, sit, sto, com)])
 
@@ -331,12 +391,11 @@ def storage_balance(m, tm, stf, sit, com):
     For a given commodity co and timestep tm, calculate the balance of
     storage input and output """
 
-    return sum(m.e_sto_in[(tm, stframe, site, storage, com)] -
-               m.e_sto_out[(tm, stframe, site, storage, com)]
+    return sum(m.e_sto_in[(tm,) + sto_tuple] -
+               m.e_sto_out[(tm,) + sto_tuple]
                # usage as input for storage increases consumption
                # output from storage decreases consumption
-               for stframe, site, storage, commodity in m.sto_tuples
-               if site == sit and stframe == stf and commodity == com)
+               for sto_tuple in m.sto_incidence.get((stf, sit, com), ()))
 
 
 # storage costs
@@ -378,14 +437,24 @@ def storage_cost(m, cost_type):
                    m.storage_dict['cost_factor'][s]
                    for s in m.sto_tuples)
     elif cost_type == 'Variable':
-        return sum(m.e_sto_con[(tm,) + s] * m.weight * m.typeperiod['weight_typeperiod'][(m.stf_list[0], tm)] *
-                   m.storage_dict['var-cost-c'][s] *
-                   m.storage_dict['cost_factor'][s] +
-                   (m.e_sto_in[(tm,) + s] + m.e_sto_out[(tm,) + s]) *
-                   m.weight * m.typeperiod['weight_typeperiod'][(m.stf_list[0], tm)] * m.storage_dict['var-cost-p'][s] *
-                   m.storage_dict['cost_factor'][s]
-                   for tm in m.tm
-                   for s in m.sto_tuples)
+        # imported here, modelhelper itself imports this module
+        from .modelhelper import timestep_weights, weighted_timestep_sum
+        weights = timestep_weights(m, m.stf_list[0])
+        return (weighted_timestep_sum(
+                    m, m.e_sto_con, m.sto_tuples,
+                    lambda s: (m.storage_dict['var-cost-c'][s] *
+                               m.storage_dict['cost_factor'][s]),
+                    weights) +
+                weighted_timestep_sum(
+                    m, m.e_sto_in, m.sto_tuples,
+                    lambda s: (m.storage_dict['var-cost-p'][s] *
+                               m.storage_dict['cost_factor'][s]),
+                    weights) +
+                weighted_timestep_sum(
+                    m, m.e_sto_out, m.sto_tuples,
+                    lambda s: (m.storage_dict['var-cost-p'][s] *
+                               m.storage_dict['cost_factor'][s]),
+                    weights))
 
 
 def op_sto_tuples(sto_tuple, m):
@@ -0,0 +1,170 @@
+"""Mutable parameters for scenario sweeps.
+
+The electrification, PV and power price sweeps (remove_pv_in_random,
+unelectrify_heat_in_random, ...) change process capacities, commodity
+prices and limits and time-series values, not the structure of the model.
+With create_model(sweep=True) these values enter the model as mutable
+Params, so a sweep builds the model once and update_sweep_parameters only
+sets the values of the next point before it is re-solved.
+
+Swept values:
+    - process inst-cap, cap-lo, cap-up
+    - commodity price, max, maxperhour
+    - demand, supim and buy_sell_price time-series
+"""
+import pyomo.core as pyomo
+from .BuySellPrice import buy_sell_price
+
+# (input sheet, dict attribute, column, Param name, index set)
+SWEEP_COLUMNS = [
+    ('process', 'process_dict', 'inst-cap', 'pro_inst_cap', 'pro_tuples'),
+    ('process', 'process_dict', 'cap-lo', 'pro_cap_lo', 'pro_tuples'),
+    ('process', 'process_dict', 'cap-up', 'pro_cap_up', 'pro_tuples'),
+    ('commodity', 'commodity_dict', 'price', 'com_price', 'com_tuples'),
+    ('commodity', 'commodity_dict', 'max', 'com_max', 'com_tuples'),
+    ('commodity', 'commodity_dict', 'maxperhour', 'com_maxperhour',
+     'com_tuples')]
+
+# (input sheet, dict attribute, Param name)
+SWEEP_TIMESERIES = [
+    ('demand', 'demand_dict', 'demand_ts'),
+    ('supim', 'supim_dict', 'supim_ts')]
+
+
+def timeseries_tuples(m, series):
+    """(tm, stf, sit, com) tuples of a {(sit, com): {(stf, t): value}} time
+    series dict, modelled timesteps only."""
+    return [(tm, stf) + column
+            for column, values in series.items()
+            for (stf, tm) in values if tm in m.tm]
+
+
+def bsp_timeseries(m, prices):
+    """{(tm, stf, sit, com, com_type): price} of the buy/sell commodities
+    from a buy_sell_price dict."""
+    values = {}
+    for c in m.bsp_tuples:
+        price = buy_sell_price(m, c, prices)
+        values.update(((tm,) + c, price[(c[0], tm)]) for tm in m.tm)
+    return values
+
+
+def add_sweep_parameters(m):
+    """Add the swept values as mutable Params and let the rules use them.
+
+    The process_dict/commodity_dict columns and the demand/supim dicts are
+    replaced by views of the Params until restore_sweep_values is called
+    after the model is built, so the rules use the Params unchanged. The
+    buy/sell prices are added by add_sweep_prices.
+
+    Args:
+        - m: the model object, with the tuple sets defined
+
+    Returns:
+        m
+    """
+    m._sweep_values = {}
+    for sheet, attr, column, name, index in SWEEP_COLUMNS:
+        values = getattr(m, attr)[column]
+        m.add_component(name, pyomo.Param(
+            getattr(m, index), mutable=True, initialize=values,
+            doc='{} {} (sweep)'.format(sheet, column)))
+        m._sweep_values[(attr, column)] = values
+        getattr(m, attr)[column] = getattr(m, name)
+
+    for sheet, attr, name in SWEEP_TIMESERIES:
+        series = getattr(m, attr)
+        m.add_component(name + '_tuples', pyomo.Set(
+            within=m.tm * m.stf * m.sit * m.com,
+            initialize=timeseries_tuples(m, series),
+            doc='Time steps and columns of the {} time-series'.format(sheet)))
+        m.add_component(name, pyomo.Param(
+            getattr(m, name + '_tuples'), mutable=True,
+            initialize={(tm, stf, sit, com): series[(sit, com)][(stf, tm)]
+                        for (tm, stf, sit, com)
+                        in getattr(m, name + '_tuples')},
+            doc='{} time-series (sweep)'.format(sheet)))
+        param = getattr(m, name)
+        m._sweep_values[(attr, None)] = series
+        setattr(m, attr, {
+            column: {(stf, tm): param[(tm, stf) + column]
+                     for (stf, tm) in values if tm in m.tm}
+            for column, values in series.items()})
+    return m
+
+
+def add_sweep_prices(m):
+    """Add the buy/sell price time-series as mutable Param
+    m.buy_sell_price_ts, read by buy_sell_price (after add_buy_sell_price).
+    """
+    m.bsp_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.com * m.com_type,
+        initialize=sorted(set(m.com_buy_tuples) | set(m.com_sell_tuples)),
+        doc='Buy and sell commodities')
+    m.buy_sell_price_ts = pyomo.Param(
+        m.tm, m.bsp_tuples, mutable=True,
+        initialize=bsp_timeseries(m, m.buy_sell_price_dict),
+        doc='buy_sell_price time-series (sweep)')
+    return m
+
+
+def restore_sweep_values(m):
+    """Put the numeric values back into the dicts replaced by
+    add_sweep_parameters, for the reporting and later numeric use."""
+    for (attr, column), values in m._sweep_values.items():
+        if column is None:
+            setattr(m, attr, values)
+        else:
+            getattr(m, attr)[column] = values
+    m._sweep_values = {}
+
+
+def update_sweep_parameters(m, data):
+    """Set the swept values of a model built with sweep=True from the input
+    data of the next sweep point.
+
+    The data must have the same processes, commodities and time-series
+    columns as the data the model was built from; structural changes, e.g.
+    adopt_variable_tariffs renaming the import processes, need a new model.
+    The result cache of the previous save is dropped, so the next save
+    reads the re-solved model.
+
+    Args:
+        - m: a model built by create_model(..., sweep=True)
+        - data: the prepared input data dict of the sweep point
+
+    Returns:
+        None
+    """
+    if not m.mode['sweep']:
+        raise ValueError('update_sweep_parameters needs a model built with '
+                         'create_model(..., sweep=True)')
+
+    for sheet, attr, column, name, index in SWEEP_COLUMNS:
+        values = data[sheet][column].to_dict()
+        if set(values) != set(getattr(m, index)):
+            raise ValueError('The {} sheet of the sweep point has other rows '
+                             'than the model; build a new model'.format(sheet))
+        getattr(m, name).store_values(values)
+        getattr(m, attr)[column] = values
+
+    for sheet, attr, name in SWEEP_TIMESERIES:
+        series = data[sheet].to_dict()
+        if set(series) != set(getattr(m, attr)):
+            raise ValueError('The {} time-series of the sweep point has other '
+                             'columns than the model; build a new model'
+                             .format(sheet))
+        getattr(m, name).store_values(
+            {(tm, stf, sit, com): series[(sit, com)][(stf, tm)]
+             for (tm, stf, sit, com) in getattr(m, name + '_tuples')})
+        setattr(m, attr, series)
+
+    if m.mode['bsp']:
+        prices = data['buy_sell_price'].dropna(axis=0, how='all').to_dict()
+        m.buy_sell_price_ts.store_values(bsp_timeseries(m, prices))
+        m.buy_sell_price_dict = prices
+
+    m._data = data
+    # the result cache of the last save holds the previous point's values
+    if hasattr(m, '_result'):
+        del m._result
@@ -38,6 +38,413 @@ def remove_duplicate_transmission(transmission_keys):
     return set(tra_tuple_list)
 
 
+def transmission_topology(tra_tuples):
+    """Topology index of the transmission network.
+    Built once per model so that the balance and line rules do not scan
+    all transmission tuples for every timestep and site.
+    Args:
+        tra_tuples: (stf, sin, sout, tra, com) transmission tuples
+    Returns:
+        dict with
+        'out': (stf, sit, com) -> tuples of lines leaving site sit,
+        'in': (stf, sit, com) -> tuples of lines arriving at site sit,
+        'parallel': (stf, sin, sout, com) -> parallel options (tra) of a
+        line section
+    """
+    topology = {'out': {}, 'in': {}, 'parallel': {}}
+    for (stf, sin, sout, tra, com) in tra_tuples:
+        topology['out'].setdefault((stf, sin, com), []).append(
+            (stf, sin, sout, tra, com))
+        topology['in'].setdefault((stf, sout, com), []).append(
+            (stf, sin, sout, tra, com))
+        topology['parallel'].setdefault((stf, sin, sout, com), []).append(tra)
+    return topology
+
+
+def apparent_power_polygon(order=8, assumelowq=True):
+    """Sides of the polygon approximating the apparent power circle
+    P^2 + Q^2 <= S^2 of ac lines and transformers.
+    The polygon is inscribed in the circle, with its vertices at multiples of
+    360/order degrees. Each side is p * P + q * Q <= s * S, scaled so that
+    the larger of |p| and |q| is 1.
+    Args:
+        order: number of sides, a multiple of 4 (default: 8)
+        assumelowq: keep only the sides facing the active power axis (normal
+            within 45 degrees of it), if low Q/P is assumed
+    Returns:
+        dict mapping the side number (1..order) to (p, q, s)
+    """
+    if not isinstance(order, int) or order < 4 or order % 4:
+        raise ValueError("apparent_power must be 'soc' or a polygon order that "
+                         "is a multiple of 4, not {!r}".format(order))
+    if order == 8:
+        # octagon of the original diamond rules, tan(22.5 deg) ~ sqrt(2) - 1
+        a = round(np.sqrt(2), 2)
+        sides = {1: (1, a + 1, a + 1), 2: (1, a - 1, 1),
+                 3: (1, -(a - 1), 1), 4: (-1, a + 1, a + 1),
+                 5: (-1, -(a + 1), a + 1), 6: (-1, -(a - 1), 1),
+                 7: (-1, a - 1, 1), 8: (1, -(a + 1), a + 1)}
+    else:
+        sides = {}
+        for k in range(order):
+            normal = (2 * k + 1) * np.pi / order
+            p, q = np.cos(normal), np.sin(normal)
+            scale = max(abs(p), abs(q))
+            sides[k + 1] = (p / scale, q / scale, np.cos(np.pi / order) / scale)
+    if assumelowq:
+        sides = {side: (p, q, s) for side, (p, q, s) in sides.items()
+                 if abs(p) >= abs(q) - 1e-9}
+    return sides
+
+
+def lazy_line_loading_tuples(m, lines, peak_share=0.05):
+    """Initial (tm, line) pairs of the lazy line loading rows: all lines in
+    the peak load timesteps, and the lines at the transformer and the main
+    busbar in all timesteps.
+    Args:
+        m: the model object
+        lines: transmission tuples, e.g. m.tra_tuples_ac_cap
+        peak_share: share of the timesteps with the highest electricity demand
+    Returns:
+        list of (tm, stf, sin, sout, tra, com) tuples
+    """
+    load = dict.fromkeys(m.tm, 0)
+    for (sit, com), demand in m.demand_dict.items():
+        if com == 'electricity':
+            for (stf, tm), value in demand.items():
+                if tm in load:
+                    load[tm] += value
+    peak = sorted(load, key=load.get, reverse=True)
+    peak = set(peak[:max(1, int(math.ceil(peak_share * len(peak))))])
+    near = set(sit for (stf, sit) in m.sit_slackbus)
+    near |= set(line[2] for (stf, sit) in m.sit_slackbus
+                for line in m.tra_topology['out'].get((stf, sit, 'electricity'), ()))
+    return [(tm,) + line for tm in m.tm for line in lines
+            if tm in peak or line[1] in near or line[2] in near]
+
+
+def line_loading_violations(m, tol=1e-6):
+    """Lazy line loading: line loading rows violated by the current solution
+    that are not part of the model yet. All (tm, line) pairs are checked at
+    once on arrays of the flow and capacity values.
+    Args:
+        m: the model object, solved
+        tol: absolute violation tolerance
+    Returns:
+        dict with the new indices of m.tra_loading_non_ac ('non_ac') and of
+        m.tra_loading_ac ('ac')
+    """
+    tms = list(m.tm)
+    dt = pyomo.value(m.dt)
+
+    def values(var, lines):
+        # (timestep, line) array of variable values
+        return np.array([[var[(tm,) + line].value for line in lines] for tm in tms],
+                        dtype=float).reshape(len(tms), len(lines))
+
+    def capacities(lines):
+        return dt * np.array([pyomo.value(m.cap_tra[line]) for line in lines])
+
+    violations = {'non_ac': [], 'ac': []}
+    lines = list(m.tra_tuples_non_ac)
+    if lines:
+        excess = values(m.e_tra_in, lines) - capacities(lines)
+        violations['non_ac'] = [(tms[i],) + lines[j]
+                                for i, j in zip(*np.nonzero(excess > tol))]
+    lines = list(m.tra_tuples_ac_cap)
+    if lines:
+        p, q = values(m.e_tra_in, lines), values(m.e_tra_q_in, lines)
+        if hasattr(m, 'apparent_power_polygon'):
+            sides = sorted(m.apparent_power_polygon)
+            coef = np.array([m.apparent_power_polygon[side] for side in sides])
+            excess = (p[:, :, None] * coef[:, 0] + q[:, :, None] * coef[:, 1] -
+                      capacities(lines)[None, :, None] * coef[:, 2])
+            violations['ac'] = [(tms[i],) + lines[j] + (sides[k],)
+                                for i, j, k in zip(*np.nonzero(excess > tol))]
+        else:
+            excess = np.hypot(p, q) - capacities(lines)
+            violations['ac'] = [(tms[i],) + lines[j]
+                                for i, j in zip(*np.nonzero(excess > tol))]
+    violations['non_ac'] = [idx for idx in violations['non_ac']
+                            if idx not in m.tra_loading_non_ac]
+    violations['ac'] = [idx for idx in violations['ac']
+                        if idx not in m.tra_loading_ac]
+    return violations
+
+
+def add_line_loading_rows(m, violations):
+    """Lazy line loading: add the rows of line_loading_violations to the
+    model.
+    Returns:
+        list of the added rows
+    """
+    rows = []
+    for idx in violations['non_ac']:
+        m.tra_loading_non_ac.add(idx)
+        m.res_transmission_input_by_capacity[idx] = \
+            res_transmission_input_by_capacity_rule(m, *idx)
+        rows.append(m.res_transmission_input_by_capacity[idx])
+    if hasattr(m, 'apparent_power_polygon'):
+        constraint = m.res_transmission_input_by_apparent_power_polygon
+        rule = res_transmission_input_by_apparent_power_polygon_rule
+    else:
+        constraint = m.res_transmission_input_by_apparent_power_cone
+        rule = res_transmission_input_by_apparent_power_cone_rule
+    for idx in violations['ac']:
+        m.tra_loading_ac.add(idx)
+        constraint[idx] = rule(m, *idx)
+        rows.append(constraint[idx])
+    return rows
+
+
+def radial_paths(m):
+    """Paths of the ac sites to the root of their feeder, i.e. the rows of
+    the path incidence matrix of a radial grid. The slack buses are the
+    roots, feeders without a slack bus are rooted at their first site.
+    Args:
+        m: the model object
+    Returns:
+        dict (stf, sit) -> (root, ((stf, sin, sout, sign), ...)) with the
+        line sections from the root to the site and the sign of their
+        voltage drop, or None if the grid is meshed or a feeder has more
+        than one slack bus
+    """
+    neighbours = {}
+    for (stf, sin, sout) in m.sites_ac:
+        neighbours.setdefault((stf, sin), []).append((sout, (stf, sin, sout, -1)))
+        neighbours.setdefault((stf, sout), []).append((sin, (stf, sin, sout, 1)))
+    paths = {}
+    for root in sorted(m.sit_tuples_ac, key=lambda s: (s not in m.sit_slackbus, s)):
+        if root in paths:
+            continue
+        paths[root] = (root, ())
+        queue = [root]
+        while queue:
+            site = queue.pop()
+            path = paths[site][1]
+            for other, section in neighbours.get(site, ()):
+                if path and section[:3] == path[-1][:3]:
+                    continue
+                if (site[0], other) in paths or (site[0], other) in m.sit_slackbus:
+                    return None
+                paths[(site[0], other)] = (root, path + (section,))
+                queue.append((site[0], other))
+    return paths
+
+
+def anchored_paths(paths):
+    """Re-root the radial_paths at the nearest site with a voltage^2
+    variable. The feeder roots and the sites with sites behind them keep
+    their variable, tied to the one of their parent by a LinDistFlow row;
+    the other sites (feeder ends) are expressed by the voltage^2 of their
+    parent and the voltage drop of their line section. The voltage band
+    rows of paths to the feeder root have nonzeros growing with the depth
+    of the site; anchored, the formulation has the rows of LinDistFlow
+    with fewer variables and fewer nonzeros.
+    Args:
+        paths: dict of radial_paths
+    Returns:
+        dict (stf, sit) -> (anchor, sections) like radial_paths with the
+        anchor and at most one line section
+    """
+    def parent(section):
+        stf, sin, sout, sign = section
+        return (stf, sin) if sign < 0 else (stf, sout)
+
+    inner = set(parent(path[-1]) for root, path in paths.values() if path)
+    return {site: (site, ()) if site == root or site in inner
+            else (parent(path[-1]), path[-1:])
+            for site, (root, path) in paths.items()}
+
+
+def lazy_voltage_band_tuples(m):
+    """Initial (tm, site) pairs of the lazy voltage band: the slack buses and
+    the feeder ends (ac sites with a single neighbour) in all timesteps.
+    Args:
+        m: the model object
+    Returns:
+        list of (tm, stf, sit) tuples
+    """
+    neighbours = {}
+    for (stf, sin, sout, tra, com) in m.tra_tuples_ac:
+        neighbours.setdefault((stf, sin), set()).add(sout)
+        neighbours.setdefault((stf, sout), set()).add(sin)
+    seed = [(stf, sit) for (stf, sit) in m.sit_tuples_ac
+            if (stf, sit) in m.sit_slackbus or
+            len(neighbours.get((stf, sit), ())) <= 1]
+    return [(tm,) + sit for tm in m.tm for sit in seed]
+
+
+def voltage_band_violations(m, tol=1e-6):
+    """Lazy voltage band: (tm, site) pairs whose voltage_squared lies
+    outside of the voltage band in the current solution and that are not
+    bounded yet. All pairs are checked at once on arrays of the values.
+    Args:
+        m: the model object, solved
+        tol: absolute violation tolerance
+    Returns:
+        list of new (tm, stf, sit) indices of m.voltage_band
+    """
+    tms = list(m.tm)
+    sites = list(m.sit_tuples_ac)
+    if not sites:
+        return []
+    value = np.array([[pyomo.value(m.voltage_squared[(tm,) + sit], exception=False)
+                       for sit in sites] for tm in tms],
+                     dtype=float).reshape(len(tms), len(sites))
+    lower, upper = np.array([voltage_band(m, *sit) for sit in sites]).T
+    excess = np.maximum(lower - value, value - upper)
+    return [(tms[i],) + sites[j] for i, j in zip(*np.nonzero(excess > tol))
+            if (tms[i],) + sites[j] not in m.voltage_band]
+
+
+def add_voltage_band(m, violations):
+    """Lazy voltage band of radial grids: bound the voltage_squared of the
+    voltage_band_violations by voltage band rows, also for the feeder roots
+    (a re-solve pushes added rows to a persistent solver, not changed
+    bounds).
+    Returns:
+        list of the added rows
+    """
+    rows = []
+    for idx in violations:
+        m.voltage_band.add(idx)
+        m.res_voltage_band[idx] = voltage_band_row(m, *idx)
+        rows.append(m.res_voltage_band[idx])
+    return rows
+
+
+def site_supply_bounds(m, tms):
+    """Largest possible local electricity supply of the sites per timestep:
+    process output at full capacity (intermittent processes by their supim),
+    storage discharge at full power and stock/buy commodity use.
+    Args:
+        m: the model object
+        tms: list of timesteps
+    Returns:
+        dict (stf, sit) -> array over tms, inf if the supply is not bounded
+        (e.g. processes with part load or time variable efficiency)
+    """
+    dt = pyomo.value(m.dt)
+    supply = {}
+
+    def add(key, value):
+        supply[key] = supply.get(key, np.zeros(len(tms))) + value
+
+    for (stf, sit, com), processes in m.pro_out_incidence.items():
+        if com != 'electricity':
+            continue
+        for pro in processes:
+            if ((stf, sit, pro) in m.pro_partial_tuples or
+                    (stf, sit, pro, com) in m.pro_timevar_output_tuples):
+                add((stf, sit), np.inf)
+                continue
+            output = dt * m.process_dict['cap-up'][(stf, sit, pro)] * m.r_out_dict[(stf, pro, com)]
+            supim = [coin for coin in m.com_supim
+                     if (stf, pro, coin) in m.r_in_dict and (sit, coin) in m.supim_dict]
+            if supim:
+                output = output / m.r_in_dict[(stf, pro, supim[0])] * np.array(
+                    [m.supim_dict[(sit, supim[0])][(stf, tm)] for tm in tms], dtype=float)
+            add((stf, sit), output)
+    if m.mode['sto']:
+        for (stf, sit, sto, com), cap_up in m.storage_dict['cap-up-p'].items():
+            if com == 'electricity':
+                add((stf, sit), dt * cap_up)
+    for (stf, sit, com, com_type), maxperhour in m.commodity_dict['maxperhour'].items():
+        if com == 'electricity' and com_type in ('Stock', 'Demand', 'Buy'):
+            add((stf, sit), np.inf if np.isnan(maxperhour) else dt * maxperhour)
+    return supply
+
+
+def propagate_cable_bounds(m, tol=1e-9):
+    """Bound propagation on radial feeders: every line section of a radial
+    (sub)grid has to carry the net load of the sites behind it, the demand
+    minus the largest possible local supply (site_supply_bounds). Cable and
+    ONT options whose capacity is below the peak net load on either side of
+    their section can not be chosen, their cap_tra_unit is fixed to zero and
+    their new capacity bounded by zero.
+    Args:
+        m: the model object
+        tol: relative tolerance of the capacity comparison
+    Returns:
+        list of the fixed cap_tra_unit indices
+    """
+    tms = list(m.tm)
+    dt = pyomo.value(m.dt)
+    supply = site_supply_bounds(m, tms)
+    zeros = np.zeros(len(tms))
+
+    # largest |active power| of an ac line per unit of capacity: the
+    # polygon sides with a mirrored side (p, -q) bound p * P <= s
+    p_max = 1
+    if hasattr(m, 'apparent_power_polygon'):
+        sides = list(m.apparent_power_polygon.values())
+        bounds = {1: [], -1: []}
+        for (p, q, s) in sides:
+            if p and any(abs(p2 - p) < 1e-9 and abs(q2 + q) < 1e-9 for (p2, q2, s2) in sides):
+                bounds[int(np.sign(p))].append(s / abs(p))
+        p_max = max(min(bounds[1]), min(bounds[-1])) if bounds[1] and bounds[-1] else None
+
+    fixed = []
+    for stf in m.stf:
+        neighbours = {}
+        for (st, sin, sout, tra, com) in m.tra_tuples:
+            if st == stf and com == 'electricity' and sin != sout:
+                neighbours.setdefault(sin, set()).add(sout)
+                neighbours.setdefault(sout, set()).add(sin)
+        # need[(a, b)]: peak net load of the side of b of section a-b
+        need = {}
+        seen = set()
+        for root in sorted(neighbours):
+            if root in seen:
+                continue
+            order, parent = [root], {root: None}
+            for site in order:
+                for other in sorted(neighbours[site]):
+                    if other not in parent:
+                        parent[other] = site
+                        order.append(other)
+            seen.update(order)
+            if sum(len(neighbours[site]) for site in order) != 2 * (len(order) - 1):
+                continue  # meshed
+            load, unbounded = {}, {}
+            for site in order:
+                site_supply = supply.get((stf, site), zeros)
+                unbounded[site] = int(np.isinf(site_supply).any())
+                load[site] = np.array([m.demand_dict.get((site, 'electricity'), {}).get((stf, tm), 0)
+                                       for tm in tms], dtype=float)
+                if not unbounded[site]:
+                    load[site] = load[site] - site_supply
+            for site in reversed(order[1:]):
+                load[parent[site]] = load[parent[site]] + load[site]
+                unbounded[parent[site]] += unbounded[site]
+            for site in order[1:]:
+                rest = unbounded[root] - unbounded[site]
+                need[(parent[site], site)] = -np.inf if unbounded[site] else load[site].max()
+                need[(site, parent[site])] = -np.inf if rest else (load[root] - load[site]).max()
+
+        for (st, sin, sout, tra, com) in m.tra_block_tuples_cap:
+            if st != stf or (sin, sout) not in need:
+                continue
+            if (st, sin, sout, tra, com) in m.tra_tuples_ac:
+                if p_max is None:
+                    continue
+                capacity = m.transmission_dict['tra-block'][(st, sin, sout, tra, com)] * p_max
+            elif (tra[0:4] in ('ront', 'kont') and
+                  ((stf, sin) in m.sit_slackbus or (stf, sout) in m.sit_slackbus)):
+                capacity = m.transmission_dict['tra-block'][(st, sin, sout, tra, com)]
+            else:
+                continue
+            if dt * capacity * (1 + tol) < max(need[(sin, sout)], need[(sout, sin)]):
+                m.cap_tra_unit[st, sin, sout, tra, com].fix(0)
+                if (st, sin, sout, tra, com) in m.cap_tra_new:
+                    m.cap_tra_new[st, sin, sout, tra, com].setub(0)
+                fixed.append((st, sin, sout, tra, com))
+    print('Bound propagation: {} of {} cable/ONT options fixed to zero'.format(
+        len(fixed), len(m.cap_tra_unit)))
+    return fixed
+
+
 def add_transmission(m):
 
     '''
@@ -46,8 +453,11 @@ def add_transmission(m):
     m.tra_tuples:                       Set of tuples of transmission technologies, e.g. (2020,South,Mid,hvac,Elec)
     m.tra_block_tuples:                 Set of tuples of transmission technologies with new block capacities, e.g. (2020,South,Mid,hvac,Elec)
     m.tra_decommissionable_tuples:      Set of tuples of transmission technologies that can be decommissioned, e.g. (2020,South,Mid,hvac,Elec)
+    m.tra_const_cap_tuples:             Set of tuples of transmission technologies with constant capacity (inst-cap == cap-up)
+    m.tra_var_cap_tuples:               Set of tuples of transmission technologies with capacity expansion or decommissioning
     m.operational_tra_tuples:           Set of tuples of transmission technologies that are still operational through stf_later (and the relevant years following), if built in stfe.g. (South,Mid,hvac,Elec,2020,2025)
     m.inst_tra_tuples:                  Set of tuples of transmission technologies that are still operational
+    m.tra_topology:                     Topology index (site -> incoming/outgoing lines, site pair -> parallel options)
 
     Variables:
     m.cap_tra_new:                      New transmission capacity (MW)  
@@ -55,7 +465,7 @@ def add_transmission(m):
     m.cap_tra_unit:                     New transmission capacity blocks
     m.cap_tra:                          Total transmission capacity (MW)                            as an expression object
     m.e_tra_in:                         Power flow into transmission line (MW) per timestep
-    m.e_tra_out:                        Power flow out of transmission line (MW) per timestep
+    m.e_tra_out:                        Power flow out of transmission line (MW) per timestep      as an expression object if m.mode['presolve'] is True
     '''
     # tranmission (e.g. hvac, hvdc, pipeline...)
     indexlist = set()
@@ -72,6 +482,7 @@ def add_transmission(m):
         initialize=tuple(m.transmission_dict["eff"].keys()),
         doc='Combinations of possible transmissions, e.g. '
             '(2020,South,Mid,hvac,Elec)')
+    m.tra_topology = transmission_topology(m.tra_tuples)
     m.tra_block_tuples = pyomo.Set(
         within=m.stf * m.sit * m.sit * m.tra * m.com,
         initialize=[(stf, sit, sit_, tra, com)
@@ -83,6 +494,21 @@ def add_transmission(m):
                     for (stf, sit, sit_, tra, com) in tuple(m.tra_decom_cap_dict.keys())],
         doc='Transmissions that can be decommissioned')
 
+    # transmissions with constant capacity, limited by variable bounds
+    # imported here, modelhelper itself imports this module
+    from .modelhelper import const_capacity_tuples
+    m.tra_const_cap_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.sit * m.tra * m.com,
+        initialize=const_capacity_tuples(m, m.tra_tuples,
+                                         m.tra_const_cap_dict,
+                                         m.tra_decom_cap_dict),
+        doc='Transmissions with constant capacity (inst-cap == cap-up)')
+    m.tra_var_cap_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.sit * m.tra * m.com,
+        initialize=[t for t in m.tra_tuples
+                    if t not in m.tra_const_cap_tuples],
+        doc='Transmissions with capacity expansion or decommissioning')
+
     if m.mode['int']:
         m.operational_tra_tuples = pyomo.Set(
             within=m.sit * m.sit * m.tra * m.com * m.stf * m.stf,
@@ -114,6 +540,11 @@ def add_transmission(m):
         within=pyomo.NonNegativeIntegers,
         doc='New transmission capacity blocks')
 
+    # no new capacity for constant capacities, only the Invest cost uses
+    # their cap_tra_new (c.f. const_capacity_tuples)
+    for t in m.tra_const_cap_tuples:
+        m.cap_tra_new[t].fix(0)
+
     # transmission capacity as expression object
     m.cap_tra = pyomo.Expression(
         m.tra_tuples,
@@ -123,27 +554,35 @@ def add_transmission(m):
     m.e_tra_in = pyomo.Var(
         m.tm, m.tra_tuples,
         within=pyomo.NonNegativeReals,
+        bounds=e_tra_bounds_rule,
         doc='Power flow into transmission line (MW) per timestep')
-    m.e_tra_out = pyomo.Var(
-        m.tm, m.tra_tuples,
-        within=pyomo.NonNegativeReals,
-        doc='Power flow out of transmission line (MW) per timestep')
+    if m.mode['presolve']:
+        m.e_tra_out = pyomo.Expression(
+            m.tm, m.tra_tuples,
+            rule=e_tra_out_rule,
+            doc='Power flow out of transmission line (MW) per timestep')
+    else:
+        m.e_tra_out = pyomo.Var(
+            m.tm, m.tra_tuples,
+            within=pyomo.NonNegativeReals,
+            doc='Power flow out of transmission line (MW) per timestep')
 
     # transmission
     m.def_cap_tra_new = pyomo.Constraint(
         m.tra_block_tuples,
         rule=def_cap_tra_new_rule,
         doc='cap_tra_new = tra-block * cap_tra_new')
-    m.def_transmission_output = pyomo.Constraint(
-        m.tm, m.tra_tuples,
-        rule=def_transmission_output_rule,
-        doc='transmission output = transmission input * efficiency')
+    if not m.mode['presolve']:
+        m.def_transmission_output = pyomo.Constraint(
+            m.tm, m.tra_tuples,
+            rule=def_transmission_output_rule,
+            doc='transmission output = transmission input * efficiency')
     m.res_transmission_input_by_capacity = pyomo.Constraint(
-        m.tm, m.tra_tuples,
+        m.tm, m.tra_var_cap_tuples,
         rule=res_transmission_input_by_capacity_rule,
         doc='transmission input <= total transmission capacity')
     m.res_transmission_capacity = pyomo.Constraint(
-        m.tra_tuples,
+        m.tra_var_cap_tuples,
         rule=res_transmission_capacity_rule,
         doc='transmission.cap-lo <= total transmission capacity <= '
             'transmission.cap-up')
@@ -166,8 +605,12 @@ def add_transmission_dc(m):
     m.tra_tuples_dc:                    Combinations of possible bidirectional dc transmissions, e.g. (2020,South,Mid,hvac,Elec)
     m.tra_block_tuples:                 Transmission with new block capacities
     m.tra_tuples_tp:                    Combinations of possible transport transmissions, e.g. (2020,South,Mid,hvac,Elec)
+    m.tra_const_cap_tuples:             Transmissions with constant capacity (inst-cap == cap-up)
+    m.tra_var_cap_tuples:               Transmissions with capacity expansion or decommissioning
+    m.tra_tuples_dc_var_cap:            DC transmissions with capacity expansion or decommissioning
     m.operational_tra_tuples:           Transmissions that are still operational through stf_later (and the relevant years following), if built in stf              if m.mode['int'] is True
     m.inst_tra_tuples:                  Installed transmissions that are still operational through stf                                                              if m.mode['int'] is True
+    m.tra_topology:                     Topology index (site -> incoming/outgoing lines, site pair -> parallel options)
 
     Variables:
 
@@ -177,7 +620,7 @@ def add_transmission_dc(m):
     m.cap_tra:                          Total transmission capacity (MW)                            as an expression object
     m.e_tra_abs:                        Absolute power flow on transmission line (MW) per timestep
     m.e_tra_in:                         Power flow into transmission line (MW) per timestep
-    m.e_tra_out:                        Power flow out of transmission line (MW) per timestep
+    m.e_tra_out:                        Power flow out of transmission line (MW) per timestep      as an expression object if m.mode['presolve'] is True
     m.voltage_angle:                    Voltage angle (rad) per timestep, support time frame and site
     '''
     # defining transmission tuple sets for transport and DCPF model separately
@@ -207,6 +650,7 @@ def add_transmission_dc(m):
         doc='Combinations of possible transmissions,'
             'without duplicate dc transmissions'
             ' e.g. (2020,South,Mid,hvac,Elec)')
+    m.tra_topology = transmission_topology(m.tra_tuples)
     m.tra_decommissionable_tuples = pyomo.Set(
         within=m.stf * m.sit * m.sit * m.tra * m.com,
         initialize=[(stf, sit, sit_, tra, com)
@@ -232,6 +676,26 @@ def add_transmission_dc(m):
         doc='Combinations of possible transport transmissions,'
             'e.g. (2020,South,Mid,hvac,Elec)')
 
+    # transmissions with constant capacity, limited by variable bounds
+    # imported here, modelhelper itself imports this module
+    from .modelhelper import const_capacity_tuples
+    m.tra_const_cap_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.sit * m.tra * m.com,
+        initialize=const_capacity_tuples(m, m.tra_tuples,
+                                         m.tra_const_cap_dict,
+                                         m.tra_decom_cap_dict),
+        doc='Transmissions with constant capacity (inst-cap == cap-up)')
+    m.tra_var_cap_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.sit * m.tra * m.com,
+        initialize=[t for t in m.tra_tuples
+                    if t not in m.tra_const_cap_tuples],
+        doc='Transmissions with capacity expansion or decommissioning')
+    m.tra_tuples_dc_var_cap = pyomo.Set(
+        within=m.stf * m.sit * m.sit * m.tra * m.com,
+        initialize=[t for t in m.tra_tuples_dc
+                    if t not in m.tra_const_cap_tuples],
+        doc='DC transmissions with capacity expansion or decommissioning')
+
     if m.mode['int']:
         m.operational_tra_tuples = pyomo.Set(
             within=m.sit * m.sit * m.tra * m.com * m.stf * m.stf,
@@ -263,6 +727,11 @@ def add_transmission_dc(m):
         within=pyomo.NonNegativeIntegers,
         doc='New transmission capacity blocks')
 
+    # no new capacity for constant capacities, only the Invest cost uses
+    # their cap_tra_new (c.f. const_capacity_tuples)
+    for t in m.tra_const_cap_tuples:
+        m.cap_tra_new[t].fix(0)
+
     # transmission capacity as expression object
     m.cap_tra = pyomo.Expression(
         m.tra_tuples,
@@ -276,26 +745,35 @@ def add_transmission_dc(m):
     m.e_tra_in = pyomo.Var(
         m.tm, m.tra_tuples,
         within=e_tra_domain_rule1,
+        bounds=e_tra_bounds_rule1,
         doc='Power flow into transmission line (MW) per timestep')
-    m.e_tra_out = pyomo.Var(
-        m.tm, m.tra_tuples,
-        within=e_tra_domain_rule1,
-        doc='Power flow out of transmission line (MW) per timestep')
+    if m.mode['presolve']:
+        m.e_tra_out = pyomo.Expression(
+            m.tm, m.tra_tuples,
+            rule=e_tra_out_rule,
+            doc='Power flow out of transmission line (MW) per timestep')
+    else:
+        m.e_tra_out = pyomo.Var(
+            m.tm, m.tra_tuples,
+            within=e_tra_domain_rule1,
+            doc='Power flow out of transmission line (MW) per timestep')
 
     m.voltage_angle = pyomo.Var(
         m.tm, m.stf, m.sit,
         within=pyomo.Reals,
-        doc='Voltage angle of a site')
+        bounds=voltage_angle_bounds_rule,
+        doc='Voltage angle of a site (0 at reference nodes)')
 
     # transmission
     m.def_cap_tra_new = pyomo.Constraint(
         m.tra_block_tuples,
         rule=def_cap_tra_new_rule,
         doc='cap_tra_new = tra-block * cap_tra_new')
-    m.def_transmission_output = pyomo.Constraint(
-        m.tm, m.tra_tuples,
-        rule=def_transmission_output_rule,
-        doc='transmission output = transmission input * efficiency')
+    if not m.mode['presolve']:
+        m.def_transmission_output = pyomo.Constraint(
+            m.tm, m.tra_tuples,
+            rule=def_transmission_output_rule,
+            doc='transmission output = transmission input * efficiency')
     m.def_dc_power_flow = pyomo.Constraint(
         m.tm, m.tra_tuples_dc,
         rule=def_dc_power_flow_rule,
@@ -305,10 +783,6 @@ def add_transmission_dc(m):
         m.tm, m.tra_tuples_dc,
         rule=def_angle_limit_rule,
         doc='-angle limit < angle(in) - angle(out) < angle limit')
-    m.def_slackbus_angle = pyomo.Constraint(
-        m.tm, m.sit_slackbus,
-        rule=def_slackbus_angle_rule,
-        doc='(angle_slackbus = 0')
     m.e_tra_abs1 = pyomo.Constraint(
         m.tm, m.tra_tuples_dc,
         rule=e_tra_abs_rule1,
@@ -318,15 +792,15 @@ def add_transmission_dc(m):
         rule=e_tra_abs_rule2,
         doc='-transmission dc input <= absolute transmission dc input')
     m.res_transmission_input_by_capacity = pyomo.Constraint(
-        m.tm, m.tra_tuples,
+        m.tm, m.tra_var_cap_tuples,
         rule=res_transmission_input_by_capacity_rule,
         doc='transmission input <= total transmission capacity')
     m.res_transmission_dc_input_by_capacity = pyomo.Constraint(
-        m.tm, m.tra_tuples_dc,
+        m.tm, m.tra_tuples_dc_var_cap,
         rule=res_transmission_ac_dc_input_by_capacity_rule,
         doc='-dcpf transmission input <= total transmission capacity')
     m.res_transmission_capacity = pyomo.Constraint(
-        m.tra_tuples,
+        m.tra_var_cap_tuples,
         rule=res_transmission_capacity_rule,
         doc='transmission.cap-lo <= total transmission capacity <= '
             'transmission.cap-up')
@@ -338,8 +812,87 @@ def add_transmission_dc(m):
     return m
 
 
+# adds the voltage^2 of the ac sites with the LinDistFlow voltage drop rows
+# and the voltage band
+def add_ac_voltage(m):
+    # with the lazy voltage band of radial grids only the (tm, site) pairs in
+    # m.voltage_band are limited, add_voltage_band adds the ones violated by
+    # a solution
+    if m.mode['lazy_voltage']:
+        m.voltage_band = pyomo.Set(
+            within=m.tm * m.sit_tuples_ac,
+            initialize=lazy_voltage_band_tuples(m),
+            doc='(tm, site) pairs with voltage_squared in the voltage band')
+    # radial grids: the LinDistFlow chain is solved in closed form, the
+    # voltage^2 of a site is the voltage^2 of its anchor minus the voltage
+    # drops along the path, meshed grids keep the LinDistFlow rows. The
+    # anchors are the feeder roots and, without the lazy voltage band, the
+    # sites with sites behind them (c.f. anchored_paths)
+    voltage_paths = radial_paths(m) if m.mode['radial'] else None
+    if m.mode['radial'] and voltage_paths is None:
+        if m.mode['lazy_voltage']:
+            raise ValueError('lazy_voltage needs a radial ac grid, the grid is '
+                             'meshed and keeps the LinDistFlow voltage bounds')
+        print('Radial voltage formulation: ac grid is meshed, using LinDistFlow rows')
+    if voltage_paths is not None:
+        if not m.mode['lazy_voltage']:
+            voltage_paths = anchored_paths(voltage_paths)
+        m.voltage_paths = voltage_paths
+        m.sit_tuples_ac_anchor = pyomo.Set(
+            within=m.stf * m.sit,
+            initialize=[sit for sit in m.sit_tuples_ac
+                        if voltage_paths[sit][0] == sit],
+            doc='AC sites with a voltage^2 variable')
+        m.sit_tuples_ac_path = pyomo.Set(
+            within=m.stf * m.sit,
+            initialize=[sit for sit in m.sit_tuples_ac
+                        if voltage_paths[sit][0] != sit],
+            doc='AC sites with a path to their anchor')
+        m.sites_ac_anchor = pyomo.Set(
+            within=m.stf * m.sit * m.sit,
+            initialize=[(stf, sin, sout) for (stf, sin, sout) in m.sites_ac
+                        if (stf, sin) in m.sit_tuples_ac_anchor and
+                        (stf, sout) in m.sit_tuples_ac_anchor],
+            doc='Site pairs connected with AC lines between two anchors')
+        m.voltage_squared_anchor = pyomo.Var(
+            m.tm, m.sit_tuples_ac_anchor,
+            within=pyomo.Reals,
+            bounds=voltage_squared_bounds_rule,
+            doc='Voltage^2 of an anchor kV, within the permissible voltage band')
+        m.voltage_squared = pyomo.Expression(
+            m.tm, m.sit_tuples_ac,
+            rule=voltage_squared_path_rule,
+            doc='Voltage^2 of a site kV, anchor voltage^2 - voltage drops along the path')
+    else:
+        m.voltage_squared = pyomo.Var(
+            m.tm, m.sit_tuples_ac,
+            within=pyomo.Reals,
+            bounds=voltage_squared_bounds_rule,
+            doc='Voltage^2 of a site kV, within the permissible voltage band')
+
+    # Power flow constraint for ac transmission lines/ voltage drop equation
+    # only lines, of radial grids only the lines between two anchors
+    m.def_ac_power_flow = pyomo.Constraint( #LVDS: equation 2.60 from Candas dissertation LinDistFlow
+        m.tm, m.sites_ac if voltage_paths is None else m.sites_ac_anchor,
+        rule=def_ac_power_flow_rule,
+        doc='voltage^2(in) = voltage^2(out) + 2 * (resistance(in_out) * Power_active(in_out) + reactance(in_out) * Power_reactive(in_out))')
+
+    # trafo voltage bands (line & trafo, min-voltage>0) are bounds of
+    # m.voltage_squared, see voltage_squared_bounds_rule
+    # or, for the path expressions of radial grids, rows of the sites with
+    # a path to their anchor (with the lazy voltage band those in
+    # m.voltage_band)
+    #LVDS: equations 2.65a & 2.65b of Candas dissertation
+    if voltage_paths is not None:
+        m.res_voltage_band = pyomo.Constraint(
+            *((m.voltage_band,) if m.mode['lazy_voltage'] else (m.tm, m.sit_tuples_ac_path)),
+            rule=res_voltage_band_rule,
+            doc='(base voltage * min-voltage)^2 <= voltage^2 <= (base voltage * max-voltage)^2')
+    return m
+
+
 # adds the transmission features to model with ACPF model features
-def add_transmission_ac(m, assumelowq):
+def add_transmission_ac(m, assumelowq, apparent_power=8):
 
     '''
     Sets:
@@ -356,10 +909,27 @@ def add_transmission_ac(m, assumelowq):
     m.tra_tuples_tp:                    Combinations of possible transport transmissions, e.g. (2020,South,Mid,hvac,Elec)
     m.tra_tuples_hp:                    REMOVED: 14a functionality no longer needed - heat pump electricity transmission
     m.tra_tuples_bev:                   REMOVED: 14a functionality no longer needed - BEV electricity transmission
-    m.tra_tuples_reac:                  Combinations of possible transport transmissions that deliver reactive power e.g. (2020,South,Mid,hvac,elec-reactive)
+    m.tra_tuples_reac:                  REMOVED: reactive power flows on the ac lines themselves (m.e_tra_q_in)
     m.sites_ac:                         Set of sites with AC transmission lines
+    m.tra_tuples_cap:                   Transmissions with own capacity
+    m.tra_tuples_ac_cap:                AC transmissions with own capacity
+    m.tra_block_tuples_cap:             Transmissions with new block capacities
+    m.tra_decommissionable_tuples_cap:  Transmissions that can be decommissioned
+    m.tra_topology_ac:                  Topology index of the ac lines, for the reactive power balance
+    m.apparent_power_sides:             Sides of the apparent power polygon                                                                                      if apparent_power is not 'soc'
+    m.tra_loading_non_ac:               (tm, line) pairs with transmission input by capacity rows                                                                if m.mode['lazy_lines'] is True
+    m.tra_loading_ac:                   (tm, line, side) with apparent power polygon rows, (tm, line) with cone rows                                             if m.mode['lazy_lines'] is True
+    m.voltage_band:                     (tm, site) pairs with voltage_squared bounded by the voltage band                                                         if m.mode['lazy_voltage'] is True
+    m.sit_tuples_ac_anchor:             AC sites with voltage^2 variable: feeder roots, without lazy_voltage also sites with sites behind them                   if m.mode['radial'] is True and the grid is radial
+    m.sit_tuples_ac_path:               AC sites with a path to their anchor                                                                                     if m.mode['radial'] is True and the grid is radial
+    m.sites_ac_anchor:                  Site pairs connected with AC lines between two anchors (LinDistFlow rows)                                                if m.mode['radial'] is True and the grid is radial
+    m.tra_tuples_ac_var_cap:            AC transmissions with capacity expansion or decommissioning                                                              if apparent_power is 'soc'
+    m.tra_const_cap_tuples:             Transmissions with constant capacity (inst-cap == cap-up)
+    m.tra_var_cap_tuples:               Transmissions with capacity expansion or decommissioning
+    m.tra_tuples_non_ac:                Transport and DC transmissions with variable capacity, limited by capacity in one direction
     m.operational_tra_tuples:           Transmissions that are still operational through stf_later (and the relevant years following), if built in stf               if m.mode['int'] is True
     m.inst_tra_tuples:                  Installed transmissions that are still operational through stf                                                               if m.mode['int'] is True
+    m.tra_topology:                     Topology index (site -> incoming/outgoing lines, site pair -> parallel options)
 
     Variables:
 
@@ -369,9 +939,17 @@ def add_transmission_ac(m, assumelowq):
     m.cap_tra:                          Total transmission capacity (MW)                            as an expression object
     m.e_tra_abs:                        Absolute power flow on transmission line (MW) per timestep
     m.e_tra_in:                         Power flow into transmission line (MW) per timestep 
-    m.e_tra_out:                        Power flow out of transmission line (MW) per timestep
-    m.voltage_angle:                    Voltage angle of a site
-    m.voltage_squared:                  Voltage squared of a site kV
+    m.e_tra_out:                        Power flow out of transmission line (MW) per timestep      as an expression object if m.mode['presolve'] is True
+    m.e_tra_q_in:                       Reactive power flow into ac transmission line per timestep
+    m.e_tra_q_out:                      Reactive power flow out of ac transmission line per timestep as an expression object
+    m.cap_tra_apparent:                 Total ac transmission capacity (MW) as variable             only if apparent_power is 'soc'
+    m.voltage_angle:                    Voltage angle of a site                                     only if there are dc transmissions
+    m.voltage_squared:                  Voltage squared of a site kV                                as an expression object if m.mode['radial'] is True and the grid is radial
+    m.voltage_squared_anchor:           Voltage squared of an anchor kV                             if m.mode['radial'] is True and the grid is radial
+
+    SOS constraints:
+    m.sos_ont:                          ONT types of a transformer as SOS1 set                      if m.mode['sos1'] is set
+    m.sos_ac_cable:                     Cable bundles of an ac line section as SOS1 set             if m.mode['sos1'] is set
 
     '''
     # defining transmission tuple sets for transport, DCPF and ACPF model separately
@@ -382,14 +960,17 @@ def add_transmission_ac(m, assumelowq):
     tra_tuples_ront = set()
     tra_tuples_hp = set()       
     tra_tuples_bev = set()      
-    tra_tuples_reac = set()
 
+    # reactive power flows on the electricity lines themselves (m.e_tra_q_in),
+    # 'electricity-reactive' copies of the lines in the input are skipped
     for key in m.transmission_dict['reactance']:
-        tra_tuples.add(tuple(key))
+        if key[4] != 'electricity-reactive':
+            tra_tuples.add(tuple(key))
     for key in m.transmission_dc_dict['reactance']:
         tra_tuples_dc.add(tuple(key))
     for key in m.transmission_ac_dict['resistance']:
-        tra_tuples_ac.add(tuple(key))
+        if key[4] != 'electricity-reactive':
+            tra_tuples_ac.add(tuple(key))
     for key in m.transmission_kont_dict['resistance']:
         tra_tuples_kont.add(tuple(key))
     for key in m.transmission_ront_dict['resistance']:
@@ -400,9 +981,6 @@ def add_transmission_ac(m, assumelowq):
             tra_tuples_hp.add(tuple(key))
         if key[4] == 'electricity_bev': # LVDS
             tra_tuples_bev.add(tuple(key))
-    for key in m.transmission_dict['resistance']:
-        if key[4] == 'electricity-reactive':
-            tra_tuples_reac.add(tuple(key))
 
     tra_tuples_tp = tra_tuples - tra_tuples_ac - tra_tuples_dc
     tra_tuples_ac = remove_duplicate_transmission(tra_tuples_ac)
@@ -427,6 +1005,7 @@ def add_transmission_ac(m, assumelowq):
         doc='Combinations of possible transmissions,'
             'without duplicate dc transmissions'
             ' e.g. (2020,South,Mid,hvac,Elec)')
+    m.tra_topology = transmission_topology(m.tra_tuples)
     m.tra_decommissionable_tuples = pyomo.Set(
         within=m.stf * m.sit * m.sit * m.tra * m.com,
         initialize=[(stf, sit, sit_, tra, com)
@@ -494,18 +1073,63 @@ def add_transmission_ac(m, assumelowq):
         doc='Combinations of possible transport transmissions that deliver heat pump electricity,'
                 'e.g. (2020,South,Mid,hvac,elec_hp)')
 
-    # Transmission tuples that deliver reactive power
+    # reactive power is carried by the ac lines (m.e_tra_q_in), no separate
+    # transmissions deliver it; empty set defined for backward compatibility
     m.tra_tuples_reac = pyomo.Set(
         within=m.stf * m.sit * m.sit * m.tra * m.com,
-        initialize=tuple(tra_tuples_reac),
         doc='Combinations of possible transport transmissions that deliver reactive power,'
             'e.g. (2020,South,Mid,hvac,elec-reactive)')
 
+    # materialized index sets without the (empty) hp/bev/reac sets, used
+    # instead of lazy set differences in the declarations below
+    tra_tuples_excluded = set(m.tra_tuples_hp) | set(m.tra_tuples_bev) | set(m.tra_tuples_reac)
+    m.tra_tuples_cap = pyomo.Set(
+        within=m.stf * m.sit * m.sit * m.tra * m.com,
+        initialize=[t for t in m.tra_tuples if t not in tra_tuples_excluded],
+        doc='Transmissions with own capacity')
+    m.tra_tuples_ac_cap = pyomo.Set(
+        within=m.stf * m.sit * m.sit * m.tra * m.com,
+        initialize=[t for t in m.tra_tuples_ac if t not in tra_tuples_excluded],
+        doc='AC transmissions with own capacity')
+    m.tra_block_tuples_cap = pyomo.Set(
+        within=m.stf * m.sit * m.sit * m.tra * m.com,
+        initialize=[t for t in m.tra_block_tuples if t not in tra_tuples_excluded],
+        doc='Transmissions with new block capacities')
+    m.tra_decommissionable_tuples_cap = pyomo.Set(
+        within=m.stf * m.sit * m.sit * m.tra * m.com,
+        initialize=[t for t in m.tra_decommissionable_tuples if t not in tra_tuples_excluded],
+        doc='Transmissions that can be decommissioned')
+
+    # transmissions with constant capacity; transport and dc flows are limited
+    # by variable bounds, ac lines keep their apparent power polygon
+    # imported here, modelhelper itself imports this module
+    from .modelhelper import const_capacity_tuples
+    m.tra_const_cap_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.sit * m.tra * m.com,
+        initialize=const_capacity_tuples(m, m.tra_tuples_cap,
+                                         m.tra_const_cap_dict,
+                                         m.tra_decom_cap_dict),
+        doc='Transmissions with constant capacity (inst-cap == cap-up)')
+    m.tra_var_cap_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.sit * m.tra * m.com,
+        initialize=[t for t in m.tra_tuples_cap
+                    if t not in m.tra_const_cap_tuples],
+        doc='Transmissions with capacity expansion or decommissioning')
+    m.tra_tuples_non_ac = pyomo.Set(
+        within=m.stf * m.sit * m.sit * m.tra * m.com,
+        initialize=[t for t in m.tra_tuples
+                    if t not in m.tra_tuples_ac and
+                    t not in m.tra_tuples_hp and t not in m.tra_tuples_bev and
+                    t not in m.tra_const_cap_tuples],
+        doc='Transport and DC transmissions with variable capacity, '
+            'limited by capacity in one direction')
+
     m.sites_ac = pyomo.Set(
         within=m.stf * m.sit * m.sit,
         initialize=set([(stf, sit_in, sit_out)
                     for (stf, sit_in, sit_out, tra, com) in m.tra_tuples_ac]),
         doc='Site pairs connected with AC lines ')
+    m.tra_topology_ac = transmission_topology(m.tra_tuples_ac)
 
     if m.mode['int']:
         m.operational_tra_tuples = pyomo.Set(
@@ -526,21 +1150,26 @@ def add_transmission_ac(m, assumelowq):
 
     # Variables
     m.cap_tra_new = pyomo.Var(
-        m.tra_tuples - m.tra_tuples_hp  - m.tra_tuples_bev - m.tra_tuples_reac,
+        m.tra_tuples_cap,
         within=pyomo.NonNegativeReals,
         doc='New transmission capacity (MW)')
     m.cap_tra_decommissioned = pyomo.Var(
-        m.tra_decommissionable_tuples - m.tra_tuples_hp- m.tra_tuples_bev - m.tra_tuples_reac,
+        m.tra_decommissionable_tuples_cap,
         within=pyomo.NonNegativeReals,
         doc='Decommissioned transmission capacity (MW)')
     m.cap_tra_unit = pyomo.Var(
-        m.tra_block_tuples - m.tra_tuples_hp - m.tra_tuples_bev - m.tra_tuples_reac,
-        within=pyomo.NonNegativeIntegers,
+        m.tra_block_tuples_cap,
+        within=cap_tra_unit_domain_rule,
         doc='New transmission capacity blocks')
 
+    # no new capacity for constant capacities, only the Invest cost uses
+    # their cap_tra_new (c.f. const_capacity_tuples)
+    for t in m.tra_const_cap_tuples:
+        m.cap_tra_new[t].fix(0)
+
     # transmission capacity as expression object (new transmission capacity + decommissioned transmission capacity + installed transmission capacity)
     m.cap_tra = pyomo.Expression(
-        m.tra_tuples - m.tra_tuples_hp - m.tra_tuples_bev - m.tra_tuples_reac,
+        m.tra_tuples_cap,
         rule=def_transmission_capacity_rule,
         doc='total transmission capacity = sum of new transmission capacity + decommissioned transmission capacity + installed transmission capacity')
 
@@ -551,30 +1180,47 @@ def add_transmission_ac(m, assumelowq):
     m.e_tra_in = pyomo.Var(
         m.tm, m.tra_tuples,
         within=e_tra_domain_rule2,
+        bounds=e_tra_bounds_rule2,
         doc='Power flow into transmission line (MW) per timestep')
-    m.e_tra_out = pyomo.Var(
-        m.tm, m.tra_tuples,
-        within=e_tra_domain_rule2,
-        doc='Power flow out of transmission line (MW) per timestep')
-
-    m.voltage_angle = pyomo.Var(
-        m.tm, m.stf, m.sit,
-        within=pyomo.Reals,
-        doc='Voltage angle of a site')
-    m.voltage_squared = pyomo.Var(
-        m.tm, m.sit_tuples_ac,
+    if m.mode['presolve']:
+        m.e_tra_out = pyomo.Expression(
+            m.tm, m.tra_tuples,
+            rule=e_tra_out_rule,
+            doc='Power flow out of transmission line (MW) per timestep')
+    else:
+        m.e_tra_out = pyomo.Var(
+            m.tm, m.tra_tuples,
+            within=e_tra_domain_rule2,
+            doc='Power flow out of transmission line (MW) per timestep')
+
+    # active (e_tra_in) and reactive power flow share the ac line index
+    m.e_tra_q_in = pyomo.Var(
+        m.tm, m.tra_tuples_ac,
         within=pyomo.Reals,
-        doc='Voltage^2 of a site kV')
+        doc='Reactive power flow into ac transmission line per timestep')
+    m.e_tra_q_out = pyomo.Expression(
+        m.tm, m.tra_tuples_ac,
+        rule=e_tra_q_out_rule,
+        doc='Reactive power flow out of ac transmission line per timestep')
+
+    # voltage angles are only needed for the dc power flow
+    if tra_tuples_dc:
+        m.voltage_angle = pyomo.Var(
+            m.tm, m.stf, m.sit,
+            within=pyomo.Reals,
+            doc='Voltage angle of a site')
+    add_ac_voltage(m)
 
     # transmission
     m.def_cap_tra_new = pyomo.Constraint(
-        m.tra_block_tuples - m.tra_tuples_hp - m.tra_tuples_bev - m.tra_tuples_reac,
+        m.tra_block_tuples_cap,
         rule=def_cap_tra_new_rule,
         doc='cap_tra_new = tra-block * cap_tra_new')
-    m.def_transmission_output = pyomo.Constraint(
-        m.tm, m.tra_tuples,
-        rule=def_transmission_output_rule,
-        doc='transmission output = transmission input * efficiency')
+    if not m.mode['presolve']:
+        m.def_transmission_output = pyomo.Constraint(
+            m.tm, m.tra_tuples,
+            rule=def_transmission_output_rule,
+            doc='transmission output = transmission input * efficiency')
 
     # Power flow constraint for dc transmission lines
     m.def_dc_power_flow = pyomo.Constraint(
@@ -583,26 +1229,6 @@ def add_transmission_ac(m, assumelowq):
         doc='transmission output = (angle(in)-angle(out))/ 57.2958 '
             '* -1 *(-1/reactance) * (base voltage)^2')
 
-    # Power flow constraint for ac transmission lines/ voltage drop equation
-    # only lines
-    m.def_ac_power_flow = pyomo.Constraint( #LVDS: equation 2.60 from Candas dissertation LinDistFlow
-        m.tm, m.sites_ac,
-        rule=def_ac_power_flow_rule,
-        doc='voltage^2(in) = voltage^2(out) + 2 * (resistance(in_out) * Power_active(in_out) + reactance(in_out) * Power_reactive(in_out))')
-
-    # trafo voltage bands
-    # line & trafo (min-voltage>0)
-    m.def_voltage_limit_upper = pyomo.Constraint(  #LVDS: equation 2.65a of Candas dissertation
-        m.tm, m.sit_tuples_ac,
-        rule=def_voltage_limit_upper_rule,
-        #doc='V^2 <= (base_voltage * max-voltage)^2. If OLTP (rONT) is built, the limit is raised to 1.1 pu')
-        doc='V^2 <= (base_voltage * max-voltage)^2 - fixed limit from input file')
-    m.def_voltage_limit_lower = pyomo.Constraint( #LVDS: equation 2.65b of Candas dissertation
-        m.tm, m.sit_tuples_ac,
-        rule=def_voltage_limit_lower_rule,
-        #doc='(base_voltage * min-voltage)^2 <= V^2 <= If OLTP (rONT) is built, the limit is lowered to 0.9 pu')
-        doc='(base_voltage * min-voltage)^2 <= V^2 - fixed limit from input file')
-
 
     m.def_angle_limit = pyomo.Constraint(
         m.tm, m.tra_tuples_dc,
@@ -612,48 +1238,70 @@ def add_transmission_ac(m, assumelowq):
         m.tm, m.tra_tuples_dc,
         rule=e_tra_abs_rule1,
         doc='transmission ac/dc input <= absolute transmission ac/dc input')
+
+    # line loading rows, for all (tm, line) pairs or, with lazy line loading,
+    # for the pairs in m.tra_loading_non_ac/m.tra_loading_ac, to which
+    # add_line_loading_rows adds the ones violated by a solution
+    if apparent_power != 'soc':
+        m.apparent_power_polygon = apparent_power_polygon(apparent_power, assumelowq)
+        m.apparent_power_sides = pyomo.Set(
+            initialize=sorted(m.apparent_power_polygon),
+            doc='Sides of the polygon approximating the apparent power circle')
+    if m.mode['lazy_lines']:
+        m.tra_loading_non_ac = pyomo.Set(
+            within=m.tm * m.stf * m.sit * m.sit * m.tra * m.com,
+            initialize=lazy_line_loading_tuples(m, m.tra_tuples_non_ac),
+            doc='(tm, line) pairs with transmission input by capacity rows')
+        ac_pairs = lazy_line_loading_tuples(m, m.tra_tuples_ac_cap)
+        ac_domain = m.tm * m.stf * m.sit * m.sit * m.tra * m.com
+        if apparent_power != 'soc':
+            ac_pairs = [pair + (side,) for pair in ac_pairs
+                        for side in m.apparent_power_sides]
+            ac_domain = ac_domain * m.apparent_power_sides
+        m.tra_loading_ac = pyomo.Set(
+            within=ac_domain,
+            initialize=ac_pairs,
+            doc='(tm, line[, side]) with apparent power rows')
+        non_ac_index = (m.tra_loading_non_ac,)
+        ac_index = (m.tra_loading_ac,)
+    else:
+        non_ac_index = (m.tm, m.tra_tuples_non_ac)
+        ac_index = (m.tm, m.tra_tuples_ac_cap)
+        if apparent_power != 'soc':
+            ac_index += (m.apparent_power_sides,)
+
     m.res_transmission_input_by_capacity = pyomo.Constraint(
-        m.tm, m.tra_tuples - m.tra_tuples_ac - m.tra_tuples_hp - m.tra_tuples_bev,
+        *non_ac_index,
         rule=res_transmission_input_by_capacity_rule,
         doc='transmission input <= total transmission capacity')
 
-    # only line capacity bound on active and reactive power flow -> diamond rule
-    if not assumelowq: #LVDS: equations 2.59 & 2.64 from Candas dissertation, if low Q/P is assumed, the first four constraints
-        # are not necessary, simplifying the model.
-        m.res_transmission_input_by_apparent_power_diamond_1 = pyomo.Constraint(
-            m.tm, m.tra_tuples_ac - m.tra_tuples_hp - m.tra_tuples_bev - m.tra_tuples_reac,
-            rule=res_transmission_input_by_apparent_power_diamond_1_rule,
-            doc='four additional ac line constraints to approximate the quadratic restriction of real/reactive power')
-        m.res_transmission_input_by_apparent_power_diamond_4 = pyomo.Constraint(
-            m.tm, m.tra_tuples_ac - m.tra_tuples_hp - m.tra_tuples_bev - m.tra_tuples_reac,
-            rule=res_transmission_input_by_apparent_power_diamond_4_rule,
-            doc='four additional ac line constraints to approximate the quadratic restriction of real/reactive power')
-        m.res_transmission_input_by_apparent_power_diamond_5 = pyomo.Constraint(
-            m.tm, m.tra_tuples_ac - m.tra_tuples_hp - m.tra_tuples_bev - m.tra_tuples_reac,
-            rule=res_transmission_input_by_apparent_power_diamond_5_rule,
-            doc='four additional ac line constraints to approximate the quadratic restriction of real/reactive power')
-        m.res_transmission_input_by_apparent_power_diamond_8 = pyomo.Constraint(
-            m.tm, m.tra_tuples_ac - m.tra_tuples_hp - m.tra_tuples_bev - m.tra_tuples_reac,
-            rule=res_transmission_input_by_apparent_power_diamond_8_rule,
-            doc='four additional ac line constraints to approximate the quadratic restriction of real/reactive power')
-          
-    m.res_transmission_input_by_apparent_power_diamond_2 = pyomo.Constraint(
-        m.tm, m.tra_tuples_ac - m.tra_tuples_hp - m.tra_tuples_bev - m.tra_tuples_reac,
-        rule=res_transmission_input_by_apparent_power_diamond_2_rule,
-        doc='four additional ac line constraints to approximate the quadratic restriction of real/reactive power')
-    m.res_transmission_input_by_apparent_power_diamond_3 = pyomo.Constraint(
-        m.tm, m.tra_tuples_ac - m.tra_tuples_hp - m.tra_tuples_bev - m.tra_tuples_reac,
-        rule=res_transmission_input_by_apparent_power_diamond_3_rule,
-        doc='four additional ac line constraints to approximate the quadratic restriction of real/reactive power')
-    m.res_transmission_input_by_apparent_power_diamond_6 = pyomo.Constraint(
-        m.tm, m.tra_tuples_ac - m.tra_tuples_hp - m.tra_tuples_bev - m.tra_tuples_reac,
-        rule=res_transmission_input_by_apparent_power_diamond_6_rule,
-        doc='four additional ac line constraints to approximate the quadratic restriction of real/reactive power')
-    m.res_transmission_input_by_apparent_power_diamond_7 = pyomo.Constraint(
-        m.tm, m.tra_tuples_ac - m.tra_tuples_hp - m.tra_tuples_bev - m.tra_tuples_reac,
-        rule=res_transmission_input_by_apparent_power_diamond_7_rule,
-        doc='four additional ac line constraints to approximate the quadratic restriction of real/reactive power')
-      
+    # only line capacity bound on active and reactive power flow -> polygon
+    # (diamond) rule, or a single cone constraint
+    if apparent_power == 'soc':
+        m.tra_tuples_ac_var_cap = pyomo.Set(
+            within=m.stf * m.sit * m.sit * m.tra * m.com,
+            initialize=[t for t in m.tra_tuples_ac_cap
+                        if t not in m.tra_const_cap_tuples],
+            doc='AC transmissions with capacity expansion or decommissioning')
+        m.cap_tra_apparent = pyomo.Var(
+            m.tra_tuples_ac_var_cap,
+            within=pyomo.NonNegativeReals,
+            doc='Total ac transmission capacity (MW) as variable for the cone constraint')
+        m.def_cap_tra_apparent = pyomo.Constraint(
+            m.tra_tuples_ac_var_cap,
+            rule=def_cap_tra_apparent_rule,
+            doc='cap_tra_apparent = cap_tra')
+        m.res_transmission_input_by_apparent_power_cone = pyomo.Constraint(
+            *ac_index,
+            rule=res_transmission_input_by_apparent_power_cone_rule,
+            doc='active power^2 + reactive power^2 <= (dt * total transmission capacity)^2')
+    else: #LVDS: equations 2.59 & 2.64 from Candas dissertation, if low Q/P is assumed, the sides limiting
+        # mainly the reactive power are not necessary, simplifying the model.
+        m.res_transmission_input_by_apparent_power_polygon = pyomo.Constraint(
+            *ac_index,
+            rule=res_transmission_input_by_apparent_power_polygon_rule,
+            doc='ac line constraints (polygon sides) to approximate the quadratic restriction of real/reactive power')
+
     # mutually exclusive rule for single trafo
     m.def_single_ont = pyomo.Constraint( #LVDS: equation 2.61 of Candas dissertation
         m.sit_slackbus,
@@ -661,20 +1309,32 @@ def add_transmission_ac(m, assumelowq):
         doc='there can be only one ONT built, the existing has to be decommissioned if a new one is built')
     # mutually exclusive rule for single ac cable
     m.def_single_ac_cable = pyomo.Constraint( #LVDS: equation 2.54 of Candas dissertation
-        m.tra_tuples_ac - m.tra_tuples_hp- m.tra_tuples_bev - m.tra_tuples_reac,
+        m.tra_tuples_ac_cap,
         rule=def_single_ac_cable_rule,
         doc='for a given AC line section, only one bundle of cable can be built (either single line, double line, -if defined- triple one.')
+    # the same one-of-N choices as SOS1 sets, candidates ordered by capacity
+    if m.mode['sos1']:
+        m.sos_ont = pyomo.SOSConstraint(
+            m.sit_slackbus,
+            rule=sos_ont_rule,
+            sos=1,
+            doc='ONT types of a transformer as SOS1 set')
+        m.sos_ac_cable = pyomo.SOSConstraint(
+            m.sites_ac,
+            rule=sos_ac_cable_rule,
+            sos=1,
+            doc='cable bundles of an AC line section as SOS1 set')
 
     # lower bound <= transmission capacity <= upper bound
     m.res_transmission_capacity = pyomo.Constraint(
-        m.tra_tuples - m.tra_tuples_hp - m.tra_tuples_bev - m.tra_tuples_reac,
+        m.tra_var_cap_tuples,
         rule=res_transmission_capacity_rule,
         doc='transmission.cap-lo <= total transmission capacity <= '
             'transmission.cap-up')
 
     # transmission capacity from A to B == transmission capacity from B to A
     m.res_transmission_symmetry = pyomo.Constraint(
-        m.tra_tuples_tp - m.tra_tuples_hp- m.tra_tuples_bev,
+        m.tra_tuples_tp,  # tra_tuples_hp/bev are empty
         rule=res_transmission_symmetry_rule,
         doc='total transmission capacity must be symmetric in both directions')
 
@@ -713,7 +1373,7 @@ def def_transmission_capacity_rule(m, stf, sin, sout, tra, com):
                 m.cap_tra_decommissioned[stf_dec, sin, sout, tra, com] for stf_dec in m.stf if stf_dec <= stf
                 if (stf_dec, sin, sout, tra, com) in m.tra_decom_cap_dict))
     else:
-        if 0:  # (stf, sin, sout, tra, com) in m.tra_const_cap_dict:
+        if (stf, sin, sout, tra, com) in m.tra_const_cap_tuples:
             cap_tra = \
                 m.transmission_dict['inst-cap'][(stf, sin, sout, tra, com)]
         else:
@@ -753,72 +1413,64 @@ def def_ac_power_flow_rule(m, tm, stf, sin, sout): #LVDS: equation 2.60 (LinDist
     # scaled by 1000 for better numerics
     # 14a mode removed - using standard electricity transmission only
     return ( 1000 * m.voltage_squared[tm, stf, sin] == 1000 * (m.voltage_squared[tm, stf, sout] +
-             2 / 1000 * (sum(m.transmission_dict['resistance'][(st, sit_in, sit_out, tra, 'electricity')]  # P, Q: kW, voltage: kV
-                * m.e_tra_in[tm, st, sit_in, sit_out, tra, 'electricity']
-                for (st, sit_in, sit_out, tra, co) in m.tra_tuples_ac
-                if st == stf and sit_in == sin and sit_out == sout and co == 'electricity')
-                        + sum(m.transmission_dict['reactance'][(st, sit_in, sit_out, tra, 'electricity')]
-                              * m.e_tra_in[tm, st, sit_in, sit_out, tra, 'electricity-reactive']
-                              for (st, sit_in, sit_out, tra, co) in m.tra_tuples_ac
-                              if st == stf and sit_in == sin and sit_out == sout and co == 'electricity-reactive'))))
-
+             ac_voltage_drop(m, tm, stf, sin, sout)))
 
-#LVDS: diamond_rules for line/trafo capacity -> equations 2.59 & 2.64 from Candas dissertation     
-# line/trafo capacity bound on active and reactive power flow
-def res_transmission_input_by_apparent_power_diamond_1_rule(m, tm, stf, sin, sout, tra, com):
-    # LVDS: equation 2.59 from Candas dissertation. Seven more follows below and form the octagon (Figure 2.15)
-    # 14a mode removed - only standard electricity flow considered
-    return (  (m.e_tra_in[tm, stf, sin, sout, tra, 'electricity'])
-            + (round(np.sqrt(2),2) + 1) * m.e_tra_in[tm, stf, sin, sout, tra, 'electricity-reactive']
-            <= ((round(np.sqrt(2),2) + 1) * m.dt * m.cap_tra[stf, sin, sout, tra, com] ))
 
+# voltage^2 drop of a line section: 2 * (resistance * P + reactance * Q)
+def ac_voltage_drop(m, tm, stf, sin, sout):
+    return 2 / 1000 * sum(m.transmission_dict['resistance'][(stf, sin, sout, tra, 'electricity')]  # P, Q: kW, voltage: kV
+                          * m.e_tra_in[tm, stf, sin, sout, tra, 'electricity']
+                          + m.transmission_dict['reactance'][(stf, sin, sout, tra, 'electricity')]
+                          * m.e_tra_q_in[tm, stf, sin, sout, tra, 'electricity']
+                          for tra in m.tra_topology_ac['parallel'].get((stf, sin, sout, 'electricity'), ()))
 
-def res_transmission_input_by_apparent_power_diamond_2_rule(m, tm, stf, sin, sout, tra, com):
-    # 14a mode removed - only standard electricity flow considered
-    return (  (m.e_tra_in[tm, stf, sin, sout, tra, 'electricity'])
-            + (round(np.sqrt(2),2) - 1) * m.e_tra_in[tm, stf, sin, sout, tra, 'electricity-reactive']
-            <= ( m.dt * m.cap_tra[stf, sin, sout, tra, com] ))
 
+# radial grids: LinDistFlow summed along the path from the anchor
+def voltage_squared_path_rule(m, tm, stf, sit):
+    anchor, path = m.voltage_paths[(stf, sit)]
+    return (m.voltage_squared_anchor[(tm,) + anchor] +
+            sum(sign * ac_voltage_drop(m, tm, st, sin, sout)
+                for (st, sin, sout, sign) in path))
 
-def res_transmission_input_by_apparent_power_diamond_3_rule(m, tm, stf, sin, sout, tra, com):
-    # 14a mode removed - only standard electricity flow considered
-    return (  (m.e_tra_in[tm, stf, sin, sout, tra, 'electricity'])
-            - (round(np.sqrt(2),2) - 1) * m.e_tra_in[tm, stf, sin, sout, tra, 'electricity-reactive']
-            <= (m.dt * m.cap_tra[stf, sin, sout, tra, com] ))
 
+# voltage band of the path expressions, the anchors have bounds
+def res_voltage_band_rule(m, tm, stf, sit):
+    if (stf, sit) in m.sit_tuples_ac_anchor:
+        return pyomo.Constraint.Skip
+    return voltage_band_row(m, tm, stf, sit)
 
-def res_transmission_input_by_apparent_power_diamond_4_rule(m, tm, stf, sin, sout, tra, com):
-    # 14a mode removed - only standard electricity flow considered
-    return (  -m.e_tra_in[tm, stf, sin, sout, tra, 'electricity']
-            + (round(np.sqrt(2),2) + 1) * m.e_tra_in[tm, stf, sin, sout, tra, 'electricity-reactive']
-            <= ((round(np.sqrt(2),2) + 1) * m.dt * m.cap_tra[stf, sin, sout, tra, com] ))
 
-def res_transmission_input_by_apparent_power_diamond_5_rule(m, tm, stf, sin, sout, tra, com):
-    # 14a mode removed - only standard electricity flow considered
-    return ( - m.e_tra_in[tm, stf, sin, sout, tra, 'electricity']
-            - (round(np.sqrt(2),2) + 1) * m.e_tra_in[tm, stf, sin, sout, tra, 'electricity-reactive']
-            <= ((round(np.sqrt(2),2) + 1) * m.dt * m.cap_tra[stf, sin, sout, tra, com] ))
+# voltage band row, scaled by 1000 like the LinDistFlow
+def voltage_band_row(m, tm, stf, sit):
+    lower, upper = voltage_band(m, stf, sit)
+    return (1000 * lower, 1000 * m.voltage_squared[tm, stf, sit], 1000 * upper)
 
 
-def res_transmission_input_by_apparent_power_diamond_6_rule(m, tm, stf, sin, sout, tra, com):
-    # 14a mode removed - only standard electricity flow considered
-    return (-  (m.e_tra_in[tm, stf, sin, sout, tra, 'electricity'])
-            - (round(np.sqrt(2),2) - 1) * m.e_tra_in[tm, stf, sin, sout, tra, 'electricity-reactive']
-            <= (m.dt * m.cap_tra[stf, sin, sout, tra, com] ))
+#LVDS: diamond_rules for line/trafo capacity -> equations 2.59 & 2.64 from Candas dissertation
+# line/trafo capacity bound on active and reactive power flow, one side of the polygon
+def res_transmission_input_by_apparent_power_polygon_rule(m, tm, stf, sin, sout, tra, com, side):
+    p, q, s = m.apparent_power_polygon[side]
+    return (p * m.e_tra_in[tm, stf, sin, sout, tra, 'electricity']
+            + q * m.e_tra_q_in[tm, stf, sin, sout, tra, 'electricity']
+            <= s * m.dt * m.cap_tra[stf, sin, sout, tra, com])
 
 
-def res_transmission_input_by_apparent_power_diamond_7_rule(m, tm, stf, sin, sout, tra, com):
-    # 14a mode removed - only standard electricity flow considered
-    return (- m.e_tra_in[tm, stf, sin, sout, tra, 'electricity']
-            + (round(np.sqrt(2),2) - 1) * m.e_tra_in[tm, stf, sin, sout, tra, 'electricity-reactive']
-            <= (m.dt * m.cap_tra[stf, sin, sout, tra, com] ))
+# line/trafo capacity bound on apparent power as second-order cone
+def res_transmission_input_by_apparent_power_cone_rule(m, tm, stf, sin, sout, tra, com):
+    if (stf, sin, sout, tra, com) in m.tra_const_cap_tuples:
+        capacity = m.transmission_dict['inst-cap'][(stf, sin, sout, tra, com)]
+    else:
+        capacity = m.cap_tra_apparent[stf, sin, sout, tra, com]
+    return (m.e_tra_in[tm, stf, sin, sout, tra, 'electricity'] ** 2
+            + m.e_tra_q_in[tm, stf, sin, sout, tra, 'electricity'] ** 2
+            <= (m.dt * capacity) ** 2)
 
 
-def res_transmission_input_by_apparent_power_diamond_8_rule(m, tm, stf, sin, sout, tra, com):
-    # 14a mode removed - only standard electricity flow considered
-    return ((m.e_tra_in[tm, stf, sin, sout, tra, 'electricity'])
-            - (round(np.sqrt(2),2) + 1) * m.e_tra_in[tm, stf, sin, sout, tra, 'electricity-reactive']
-            <= ((round(np.sqrt(2),2) + 1) * m.dt * m.cap_tra[stf, sin, sout, tra, com] ))
+# variable copy of the total capacity, so that the cone constraint has the
+# standard form x^2 + y^2 <= z^2 (z >= 0) that solvers detect
+def def_cap_tra_apparent_rule(m, stf, sin, sout, tra, com):
+    return (m.cap_tra_apparent[stf, sin, sout, tra, com] ==
+            m.cap_tra[stf, sin, sout, tra, com])
 
 
 # rule to hold voltage within defined permissible range
@@ -852,35 +1504,74 @@ def def_voltage_limit_lower_rule(m, tm, stf, sit): # LVDS: equation 2.65b of Can
 '''
 
 # Fixed voltage limits - no adaptive behavior based on transformer type
-def def_voltage_limit_upper_rule(m, tm, stf, sit):
-    """Fixed upper voltage limit regardless of transformer type"""
-    return (m.voltage_squared[tm, stf, sit] / m.site_dict['base-voltage'][(stf, sit)] 
-            <= m.site_dict['max-voltage'][(stf, sit)] ** 2 * m.site_dict['base-voltage'][(stf, sit)])
+# (base_voltage * min-voltage)^2 <= V^2 <= (base_voltage * max-voltage)^2
+def voltage_band(m, stf, sit):
+    """Fixed voltage band regardless of transformer type"""
+    base_voltage = m.site_dict['base-voltage'][(stf, sit)]
+    return ((m.site_dict['min-voltage'][(stf, sit)] * base_voltage) ** 2,
+            (m.site_dict['max-voltage'][(stf, sit)] * base_voltage) ** 2)
+
 
-def def_voltage_limit_lower_rule(m, tm, stf, sit):
-    """Fixed lower voltage limit regardless of transformer type"""
-    return (m.voltage_squared[tm, stf, sit] / m.site_dict['base-voltage'][(stf, sit)]
-            >= m.site_dict['min-voltage'][(stf, sit)] ** 2 * m.site_dict['base-voltage'][(stf, sit)])
+def voltage_squared_bounds_rule(m, tm, stf, sit):
+    if m.mode['lazy_voltage'] and (tm, stf, sit) not in m.voltage_band:
+        return (None, None)
+    return voltage_band(m, stf, sit)
 
 
 # reference nodes' voltage angle in subsystems are set to zero (not necessary but for clearness)
-def def_slackbus_angle_rule(m, tm, stf, sin):
-    return m.voltage_angle[tm, stf, sin] == 0
+def voltage_angle_bounds_rule(m, tm, stf, sin):
+    if (stf, sin) in m.sit_slackbus:
+        return (0, 0)
+    return (None, None)
 
 
 # mutually exclusive rule for single trafo
 def def_single_ont_rule(m, stf, sit): # LVDS: equation 2.61
-    return (sum(m.cap_tra_unit[(st, sit_in, sit_out, tra, com)]
-                for (st, sit_in, sit_out, tra, com) in m.tra_tuples
-                if sit_in == sit and st == stf and tra[0:4] == 'ront' and com == 'electricity') +
-            sum(m.cap_tra_unit[(st, sit_in, sit_out, tra, com)]
-                for (st, sit_in, sit_out, tra, com) in m.tra_tuples
-                if sit_in == sit and st == stf and tra[0:4] == 'kont' and com == 'electricity') == 1)
+    ont_lines = m.tra_topology['out'].get((stf, sit, 'electricity'), ())
+    return (sum(m.cap_tra_unit[tra_tuple]
+                for tra_tuple in ont_lines if tra_tuple[3][0:4] == 'ront') +
+            sum(m.cap_tra_unit[tra_tuple]
+                for tra_tuple in ont_lines if tra_tuple[3][0:4] == 'kont') == 1)
+
+
+# SOS1 set of the candidates of a one-of-N choice, weighted by their rank in
+# capacity (unique weights); choices with less than two candidates need no set
+def sos_candidates(m, candidates):
+    candidates = sorted((t for t in candidates if t in m.tra_block_tuples_cap),
+                        key=lambda t: (m.transmission_dict['tra-block'][t], t))
+    if len(candidates) < 2:
+        return pyomo.SOSConstraint.Skip
+    return ([m.cap_tra_unit[t] for t in candidates],
+            list(range(1, len(candidates) + 1)))
+
+
+def sos_ont_rule(m, stf, sit):
+    return sos_candidates(m, [tra_tuple for tra_tuple
+                              in m.tra_topology['out'].get((stf, sit, 'electricity'), ())
+                              if tra_tuple[3][0:4] in ('ront', 'kont')])
+
+
+def sos_ac_cable_rule(m, stf, sin, sout):
+    return sos_candidates(m, [(stf, sin, sout, option, 'electricity') for option
+                              in m.tra_topology_ac['parallel'][(stf, sin, sout, 'electricity')]])
+
+
+# capacity blocks are integer, with continuous SOS1 the cable and ONT choices
+# are continuous in [0, 1] and made integral by the SOS1 sets
+def cap_tra_unit_domain_rule(m, stf, sin, sout, tra, com):
+    if m.mode['sos1'] == 'continuous' and (
+            (stf, sin, sout, tra, com) in m.tra_tuples_ac or
+            (com == 'electricity' and (stf, sin) in m.sit_slackbus and
+             tra[0:4] in ('ront', 'kont'))):
+        return pyomo.UnitInterval
+    return pyomo.NonNegativeIntegers
+
+
 # mutually exclusive rule for single ac cable
 def def_single_ac_cable_rule(m, stf, sin, sout, tra, com): # LVDS: equation 2.54
-    return (sum(m.cap_tra_unit[(st, sit_in, sit_out, tra, co)]
-                for (st, sit_in, sit_out, tra, co) in m.tra_tuples_ac
-                if sit_in == sin and sit_out == sout and stf == st and com == co) == 1)
+    return (sum(m.cap_tra_unit[(stf, sin, sout, option, com)]
+                for option in m.tra_topology['parallel'][(stf, sin, sout, com)]
+                if (stf, sin, sout, option, com) in m.tra_tuples_ac) == 1)
 
 
 # voltage angle difference rule for DCPF transmission
@@ -890,6 +1581,18 @@ def def_angle_limit_rule(m, tm, stf, sin, sout, tra, com):
             m.transmission_dict['difflimit'][(stf, sin, sout, tra, com)])
 
 
+# presolve: transmission output as expression of transmission input
+def e_tra_out_rule(m, tm, stf, sin, sout, tra, com):
+    return (m.e_tra_in[tm, stf, sin, sout, tra, com] *
+            m.transmission_dict['eff'][(stf, sin, sout, tra, com)])
+
+
+# reactive power output of an ac line, with the efficiency of the line
+def e_tra_q_out_rule(m, tm, stf, sin, sout, tra, com):
+    return (m.e_tra_q_in[tm, stf, sin, sout, tra, com] *
+            m.transmission_dict['eff'][(stf, sin, sout, tra, com)])
+
+
 # first rule for creating absolute transmission input
 def e_tra_abs_rule1(m, tm, stf, sin, sout, tra, com):
     return (m.e_tra_in[tm, stf, sin, sout, tra, com] <=
@@ -902,6 +1605,29 @@ def e_tra_abs_rule2(m, tm, stf, sin, sout, tra, com):
             m.e_tra_abs[tm, stf, sin, sout, tra, com])
 
 
+# transmission input <= constant transmission capacity as variable bound
+def e_tra_bounds_rule(m, tm, stf, sin, sout, tra, com):
+    if (stf, sin, sout, tra, com) in m.tra_const_cap_tuples:
+        return (None, m.dt.value *
+                m.transmission_dict['inst-cap'][(stf, sin, sout, tra, com)])
+    return (None, None)
+
+
+# - dcpf transmission input <= constant transmission capacity likewise
+def e_tra_bounds_rule1(m, tm, stf, sin, sout, tra, com):
+    lower, upper = e_tra_bounds_rule(m, tm, stf, sin, sout, tra, com)
+    if upper is not None and (stf, sin, sout, tra, com) in m.tra_tuples_dc:
+        lower = -upper
+    return (lower, upper)
+
+
+# ac lines are bound by the apparent power polygon instead
+def e_tra_bounds_rule2(m, tm, stf, sin, sout, tra, com):
+    if (stf, sin, sout, tra, com) in m.tra_tuples_ac:
+        return (None, None)
+    return e_tra_bounds_rule(m, tm, stf, sin, sout, tra, com)
+
+
 # transmission input <= transmission capacity
 def res_transmission_input_by_capacity_rule(m, tm, stf, sin, sout, tra, com):
     if com == 'electricity':
@@ -927,6 +1653,10 @@ def res_transmission_capacity_rule(m, stf, sin, sout, tra, com):
 
 # transmission capacity from A to B == transmission capacity from B to A
 def res_transmission_symmetry_rule(m, stf, sin, sout, tra, com):
+    # both directions with constant capacity: no variable left in the row
+    if ((stf, sin, sout, tra, com) in m.tra_const_cap_tuples and
+            (stf, sout, sin, tra, com) in m.tra_const_cap_tuples):
+        return pyomo.Constraint.Skip
     return m.cap_tra[stf, sin, sout, tra, com] == (m.cap_tra[stf, sout, sin, tra, com])
 
 # transmission balance """called in commodity balance For a given commodity co and timestep tm, calculate the balance of import and export """
@@ -935,20 +1665,18 @@ def transmission_balance(m, tm, stf, sit, com):
     For a given commodity co and timestep tm, calculate the balance of
     import and export """
 
-    return (sum(m.e_tra_in[(tm, stframe, site_in, site_out,
-                            transmission, com)]
+    if com == 'electricity-reactive' and m.mode['acpf']:
+        # reactive power flows on the ac electricity lines
+        return (sum(m.e_tra_q_in[(tm,) + tra_tuple]
+                    for tra_tuple in m.tra_topology_ac['out'].get((stf, sit, 'electricity'), ())) -
+                sum(m.e_tra_q_out[(tm,) + tra_tuple]
+                    for tra_tuple in m.tra_topology_ac['in'].get((stf, sit, 'electricity'), ())))
+    return (sum(m.e_tra_in[(tm,) + tra_tuple]
                 # exports increase balance
-                for stframe, site_in, site_out, transmission, commodity
-                in m.tra_tuples
-                if (site_in == sit and stframe == stf and
-                    commodity == com)) -
-            sum(m.e_tra_out[(tm, stframe, site_in, site_out,
-                             transmission, com)]
+                for tra_tuple in m.tra_topology['out'].get((stf, sit, com), ())) -
+            sum(m.e_tra_out[(tm,) + tra_tuple]
                 # imports decrease balance
-                for stframe, site_in, site_out, transmission, commodity
-                in m.tra_tuples
-                if (site_out == sit and stframe == stf and
-                    commodity == com)))
+                for tra_tuple in m.tra_topology['in'].get((stf, sit, com), ())))
 
 
 # transmission cost function
@@ -978,34 +1706,22 @@ def transmission_cost(m, cost_type):
                    m.transmission_dict['cost_factor'][t]
                    for t in m.tra_tuples - m.tra_tuples_hp - m.tra_tuples_bev - m.tra_tuples_reac)
     elif cost_type == 'Variable':
-        if m.mode['dcpf']:
-            return sum(m.e_tra_in[(tm,) + t] * m.weight * m.typeperiod['weight_typeperiod'][(m.stf_list[0], tm)] *
-                       m.transmission_dict['var-cost'][t] *
-                       m.transmission_dict['cost_factor'][t]
-                       for tm in m.tm
-                       for t in m.tra_tuples_tp) + \
-                   sum(m.e_tra_abs[(tm,) + t] * m.weight * m.typeperiod['weight_typeperiod'][(m.stf_list[0], tm)] *
-                       m.transmission_dict['var-cost'][t] *
-                       m.transmission_dict['cost_factor'][t]
-                       for tm in m.tm
-                       for t in m.tra_tuples_dc)
-        if m.mode['acpf']:
-            return sum(m.e_tra_in[(tm,) + t] * m.weight * m.typeperiod['weight_typeperiod'][(m.stf_list[0], tm)] *
-                       m.transmission_dict['var-cost'][t] *
-                       m.transmission_dict['cost_factor'][t]
-                       for tm in m.tm
-                       for t in m.tra_tuples_tp) + \
-                   sum(m.e_tra_abs[(tm,) + t] * m.weight * m.typeperiod['weight_typeperiod'][(m.stf_list[0], tm)] *
-                       m.transmission_dict['var-cost'][t] *
-                       m.transmission_dict['cost_factor'][t]
-                       for tm in m.tm
-                       for t in m.tra_tuples_dc)
+        # imported here, modelhelper itself imports this module
+        from .modelhelper import timestep_weights, weighted_timestep_sum
+        weights = timestep_weights(m, m.stf_list[0])
+
+        def var_cost(t):
+            return (m.transmission_dict['var-cost'][t] *
+                    m.transmission_dict['cost_factor'][t])
+        if m.mode['dcpf'] or m.mode['acpf']:
+            # bidirectional lines are charged for their absolute flow
+            return (weighted_timestep_sum(m, m.e_tra_in, m.tra_tuples_tp,
+                                          var_cost, weights) +
+                    weighted_timestep_sum(m, m.e_tra_abs, m.tra_tuples_dc,
+                                          var_cost, weights))
         else:
-            return sum(m.e_tra_in[(tm,) + t] * m.weight * m.typeperiod['weight_typeperiod'][(m.stf_list[0], tm)] *
-                       m.transmission_dict['var-cost'][t] *
-                       m.transmission_dict['cost_factor'][t]
-                       for tm in m.tm
-                       for t in m.tra_tuples)
+            return weighted_timestep_sum(m, m.e_tra_in, m.tra_tuples,
+                                         var_cost, weights)
 
 # for mode['int'] == True, operational transmission tuples
 def op_tra_tuples(tra_tuple, m):
@@ -9,7 +9,9 @@ def identify_mode(data):
     Features:
         Intertemporal, Transmission, Storage, Buy Sell (Price), Time
         Variable efficiency, Expansion (4 values for process, transmission,
-        storage capacity and storage power expansion)
+        storage capacity and storage power expansion); the build options
+        of create_model (presolve, lazy_lines, lazy_voltage, radial, sos1,
+        sweep) are False here and set by create_model
 
     Returns:
         mode dictionary; contains bool values that define the urbs mode
@@ -41,6 +43,12 @@ def identify_mode(data):
                 'sto-c': False,
                 'sto-p': False},
         'power_price': False,
+        'presolve': False,              # substitute definitional equalities
+        'lazy_lines': False,            # lazy line loading rows
+        'lazy_voltage': False,          # lazy voltage band of radial grids
+        'radial': False,                # radial voltage path formulation
+        'sos1': False,                  # SOS1 cable and ONT type choices
+        'sweep': False,                 # mutable Params for scenario sweeps
         }
         # UHP mode removed - no longer needed
         # 14a mode removed - this functionality is no longer needed
@@ -177,6 +177,76 @@ def read_input(input_files, year):      # used in runfunction.py
             data[key].sort_index(inplace=True)
     return data
 
+def prune_dominated_transmission(data):
+    """Remove dominated options of a line section from the transmission
+    input, e.g. cable bundles or ONT types that cost more and offer no more
+    capacity and no lower impedance than an alternative of the same section.
+
+    An option is dominated by another of the same (support timeframe, site
+    in, site out, commodity) if it is not installed (inst-cap and cap-lo 0)
+    and is at most as good in every respect: investment (inv-cost * new
+    capacity), fixed costs (fix-cost * capacity), var-cost, eff, tra-block,
+    cap-up, resistance and reactance, with equal wacc and depreciation.
+    Investment and fixed costs are compared separately, the objective
+    annualizes the one-off investment but not the annual fixed costs.
+    Identical options are pruned to the first one. Sections with a
+    decom-saving are left as they are.
+
+    Args:
+        - data: input data dict (c.f. read_input), modified in place
+
+    Returns:
+        list of (dropped option, dominating option) index tuples
+    """
+    transmission = data['transmission']
+    if transmission.empty:
+        return []
+    better = {'eff': 1, 'var-cost': -1, 'tra-block': 1, 'cap-up': 1,
+              'resistance': -1, 'reactance': -1}
+
+    def invest(option):
+        return option['inv-cost'] * max(option['tra-block'] - option['inst-cap'], 0)
+
+    def fixed(option):
+        return option['fix-cost'] * option['tra-block']
+
+    def dominates(b, a):
+        # 1 if b dominates a, 0 if they are identical, None otherwise
+        if a['wacc'] != b['wacc'] or a['depreciation'] != b['depreciation']:
+            return None
+        diff = [invest(a) - invest(b), fixed(a) - fixed(b)]
+        for column, sign in better.items():
+            if pd.isna(a[column]) and pd.isna(b[column]):
+                continue
+            diff.append(sign * (b[column] - a[column]))
+        if any(pd.isna(d) or d < 0 for d in diff):
+            return None
+        return 1 if any(d > 0 for d in diff) else 0
+
+    dropped = []
+    section_levels = ['support_timeframe', 'Site In', 'Site Out', 'Commodity']
+    for section, options in transmission.groupby(level=section_levels, sort=False):
+        if len(options) < 2 or (options['decom-saving'].fillna(0) != 0).any():
+            continue
+        rows = list(options.iterrows())
+        for i, (index, option) in enumerate(rows):
+            if option['inst-cap'] > 0 or option['cap-lo'] > 0:
+                continue
+            for j, (other_index, other) in enumerate(rows):
+                if i == j:
+                    continue
+                dominance = dominates(other, option)
+                if dominance == 1 or (dominance == 0 and j < i):
+                    dropped.append((index, other_index))
+                    break
+    if dropped:
+        data['transmission'] = transmission.drop([index for index, _ in dropped])
+    for index, other_index in dropped:
+        print('Pruned transmission option {} (dominated by {})'.format(
+            index, other_index[3]))
+    return dropped
+
+
 # preparing the pyomo model
 
 
@@ -9,7 +9,10 @@ import math
 import sys
 
 def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=None, weighting_order=None,
-                 assumelowq=True, dual=True, bui_react_model=False, flexible_heat=True):
+                 assumelowq=True, dual=True, bui_react_model=False, flexible_heat=True,
+                 presolve=False, apparent_power=8, lazy_lines=False,
+                 lazy_voltage=False, radial=False, sos1=False,
+                 propagate_bounds=False, sweep=False):
     """Create a pyomo ConcreteModel urbs object from given input data.
 
     Args:
@@ -20,6 +23,42 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
           default: "cost"
         - dual: set True to add dual variables to model output
           (marginally slower), default: True
+        - presolve: set True to substitute definitional equalities (fixed
+          ratio process flows, transmission output) by expressions instead
+          of variables and constraints, default: False
+        - assumelowq: keep only the apparent power polygon sides limiting
+          the active power of ac lines (low Q/P), default: True
+        - apparent_power: approximation of the apparent power limit of ac
+          lines, the order of the polygon (a multiple of 4) or 'soc' for a
+          second-order cone constraint (needs a solver for quadratic
+          constraints, e.g. gurobi), default: 8
+        - lazy_lines: set True to build the line loading rows of ac models
+          only for the peak load timesteps and the lines at the transformer;
+          violated rows are added by add_line_loading_rows. Models without
+          acpf raise ValueError, default: False
+        - lazy_voltage: set True (with radial) to build the voltage band
+          rows of the radial path expressions only at the slack buses and
+          feeder ends; violated rows are added by add_voltage_band. The
+          LinDistFlow voltage band is a pair of variable bounds, not rows,
+          so meshed grids and radial=False raise ValueError, default: False
+        - radial: set True to express the voltage of the feeder ends of
+          radial ac grids by the voltage of their parent site and the drop
+          of their line section, with lazy_voltage all sites by the voltage
+          drops along the path to the slack bus, instead of LinDistFlow rows
+          and variables (meshed grids keep the rows), default: False
+        - sos1: set True (or 'binary') to add the cable and ONT type choices
+          of ac models as SOS1 sets ordered by capacity (needs a solver with
+          SOS support, e.g. gurobi), 'continuous' to also relax their
+          cap_tra_unit to [0, 1] and leave the integrality to the SOS1
+          branching, default: False
+        - propagate_bounds: set True to fix cable and ONT options of radial
+          ac grids that are too small for the peak net load behind their
+          line section (c.f. propagate_cable_bounds), default: False
+        - sweep: set True to add process capacities, commodity prices and
+          limits and the demand, supim and buy/sell price time-series as
+          mutable Params, so that scenario sweeps only update their values
+          (c.f. update_sweep_parameters) instead of rebuilding the model;
+          all process capacities are variables then, default: False
 
     Returns:
         a pyomo ConcreteModel object
@@ -29,6 +68,25 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
     if not timesteps:
         timesteps = data['demand'].index.tolist()
     m = pyomo_model_prep(data, timesteps)  # preparing pyomo model
+    m.mode['presolve'] = presolve
+    m.mode['lazy_lines'] = lazy_lines
+    m.mode['lazy_voltage'] = lazy_voltage
+    m.mode['radial'] = radial
+    m.mode['sos1'] = sos1
+    m.mode['sweep'] = sweep
+    if lazy_voltage and not radial:
+        raise ValueError('lazy_voltage needs radial=True, the LinDistFlow '
+                         'voltage band is a pair of variable bounds and '
+                         'saves no rows')
+    if lazy_lines and not m.mode['acpf']:
+        raise ValueError('lazy_lines needs an ac model (transmission with '
+                         'resistance), only add_transmission_ac builds the '
+                         'line loading rows lazily')
+    if sweep and (m.mode['int'] or lazy_lines or lazy_voltage or
+                  propagate_bounds):
+        raise NotImplementedError('sweep is not supported for intertemporal '
+                                  'models, lazy_lines/lazy_voltage and '
+                                  'propagate_bounds')
     m.name = 'urbs'
     m.created = datetime.now().strftime('%Y%m%dT%H%M')
     m._data = data
@@ -99,6 +157,10 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
     m.com_demand:                   Commodities that have a demand (implies timeseries)
     m.com_env:                      Commodities that (might) have a maximum creation limit
     m.com_stock:                    Commodities that can be purchased at some site(s) 
+    m.com_stock_tuples:             Stock and demand commodities with a stock source term, e.g. (2020,Mid,Elec,Demand)
+    m.com_balance_tuples:           Commodities with a balance (all except SupIm), e.g. (2020,Mid,Elec)
+    m.com_vertex_tuples:            Commodities with a vertex rule (all except Env and SupIm)
+    m.com_env_tuples:               Environmental commodities, e.g. (2020,Mid,CO2,Env)
 
         Process
     m.pro_area_tuples:              Removed Processes and Sites with area Restriction
@@ -110,6 +172,12 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
     m.pro_rampupgrad_tuples:        Processes with maximum ramp up gradient smaller than timestep length
     m.pro_rampdowngrad_tuples:      Processes with maximum ramp down gradient smaller than timestep length
     m.pro_decommissionable_tuples:  Processes which can be decommissioned
+    m.pro_const_cap_tuples:         Processes with constant capacity (inst-cap == cap-up)
+    m.pro_var_cap_tuples:           Processes with capacity expansion or decommissioning
+    m.pro_supim_input_tuples:       SupIm commodities consumed by process by site, e.g. (2020,Mid,PV,Solar)
+    m.pro_const_input_tuples:       Commodities consumed by process with constant input ratio
+    m.pro_const_output_tuples:      Commodities produced by process with constant output ratio
+    m.pro_throughput_tuples:        Processes whose throughput is limited by capacity only
 
     '''
 
@@ -256,6 +324,13 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
         initialize=commodity_subset(m.com_tuples, 'Env'),
         ordered=False,
         doc='Commodities that (might) have a maximum creation limit')
+    m.com_stock_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.com * m.com_type,
+        initialize=[(stf, sit, com, com_type)
+                    for (stf, sit, com, com_type) in m.com_tuples
+                    if com in m.com_stock or com in m.com_demand],
+        doc='Stock and demand commodities with a stock source term, '
+            'e.g. (2020,Mid,Elec,Demand)')
 
     # process tuples for area rule -> removed
     
@@ -299,6 +374,11 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
                     if process == pro and s == stf],
         doc='Commodities produced by process by site, e.g. (2020,Mid,PV,Elec)')
 
+    # incidence index (stf, sit, com) -> consuming/producing processes,
+    # built once here so that commodity_balance does not scan m.pro_tuples
+    m.pro_in_incidence = process_incidence(m.pro_input_tuples)
+    m.pro_out_incidence = process_incidence(m.pro_output_tuples)
+
     m.pro_output_tuples_reactive = pyomo.Set(
         within=m.stf * m.sit * m.pro,
         initialize=[(stf, site, process)
@@ -328,7 +408,22 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
                     for (stf, sit, pro) in m.pro_tuples
                     if m.process_dict['decommissionable'][stf, sit, pro] == 1],
         doc='Processes which can be decommissioned')
+    # cap_pro is the constant installed capacity for these processes
+    # (none in sweep mode, the swept inst-cap/cap-up may differ later)
+    m.pro_const_cap_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.pro,
+        initialize=[] if m.mode['sweep'] else
+        const_capacity_tuples(m, m.pro_tuples, m.pro_const_cap_dict),
+        doc='Processes with constant capacity (inst-cap == cap-up)')
+    m.pro_var_cap_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.pro,
+        initialize=[p for p in m.pro_tuples
+                    if p not in m.pro_const_cap_tuples],
+        doc='Processes with capacity expansion or decommissioning')
 
+    # swept values as mutable Params
+    if m.mode['sweep']:
+        add_sweep_parameters(m)
 
     #Variable list
     # ============  
@@ -350,8 +445,10 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
     m.cap_decommissioned:   Decommissioned process capacity (MW)
     m.cap_pro:              total process capacity                                          as pyomo.expression
     m.tau_pro:              Power flow (MW) through process 
-    m.e_pro_in:             Power flow of commodity into process (MW) per timestep
-    m.e_pro_out:            Power flow out of process (MW) per timestep
+    m.e_pro_in:             Power flow of commodity into process (MW) per timestep        as pyomo.expression if mode['presolve'] is True
+    m.e_pro_out:            Power flow out of process (MW) per timestep                     as pyomo.expression if mode['presolve'] is True
+    m.e_pro_in_free:        Process input not substituted by throughput * ratio             if mode['presolve'] is True
+    m.e_pro_out_free:       Process output not substituted by throughput * ratio            if mode['presolve'] is True
     m.pro_cap_unit:         Number of newly installed capacity units
     m.pro_cap_expands:      Boolean variable whether a process is expanded
 
@@ -364,7 +461,7 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
 
     # commodity
     m.e_co_stock = pyomo.Var(
-        m.tm, m.com_tuples,
+        m.tm, m.com_stock_tuples,
         within=pyomo.NonNegativeReals,
         #within=pyomo.Reals,  # Changed from pyomo.NonNegativeReals
         doc='Use of stock commodity source (MW) per timestep')
@@ -400,15 +497,39 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
     m.tau_pro = pyomo.Var(
         m.t, m.pro_tuples,
         within=pyomo.NonNegativeReals,
+        bounds=tau_pro_bounds_rule,
         doc='Power flow (MW) through process')
-    m.e_pro_in = pyomo.Var(
-        m.tm, m.pro_input_tuples,
-        within=pyomo.NonNegativeReals,
-        doc='Power flow of commodity into process (MW) per timestep')
-    m.e_pro_out = pyomo.Var(
-        m.tm, m.pro_output_tuples,
-        within=pyomo.Reals,
-        doc='Power flow out of process (MW) per timestep')
+    if m.mode['presolve']:
+        # process flows as expressions, defined in substitute_process_flows
+        # once the fixed ratio flows are known; the remaining flows are
+        # the (sparse) free flow variables
+        m.e_pro_in = pyomo.Expression(
+            m.tm, m.pro_input_tuples,
+            doc='Power flow of commodity into process (MW) per timestep')
+        m.e_pro_out = pyomo.Expression(
+            m.tm, m.pro_output_tuples,
+            doc='Power flow out of process (MW) per timestep')
+        m.e_pro_in_free = pyomo.Var(
+            m.tm, m.pro_input_tuples,
+            within=pyomo.NonNegativeReals,
+            dense=False,
+            doc='Power flow of commodity into process (MW) per timestep, '
+                'if not a fixed ratio of the throughput')
+        m.e_pro_out_free = pyomo.Var(
+            m.tm, m.pro_output_tuples,
+            within=pyomo.Reals,
+            dense=False,
+            doc='Power flow out of process (MW) per timestep, '
+                'if not a fixed ratio of the throughput')
+    else:
+        m.e_pro_in = pyomo.Var(
+            m.tm, m.pro_input_tuples,
+            within=pyomo.NonNegativeReals,
+            doc='Power flow of commodity into process (MW) per timestep')
+        m.e_pro_out = pyomo.Var(
+            m.tm, m.pro_output_tuples,
+            within=pyomo.Reals,
+            doc='Power flow out of process (MW) per timestep')
 
     # process new capacity expansion unit
     m.pro_cap_unit = pyomo.Var(
@@ -423,11 +544,16 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
         doc='Boolean variable whether a process is expanded')
     # debug
 
+    # cost and emission weight per timestep (c.f. timestep_weights); the buy/
+    # sell limits of add_buy_sell_price are built with m.weight before
+    # add_typeperiod replaces it, the weights are recomputed after that
+    m = add_timestep_weights(m)
+
     # Add additional features
     # called features are declared in distinct files in features folder
     if m.mode['tra']:
         if m.mode['acpf']:
-            m = add_transmission_ac(m, assumelowq)
+            m = add_transmission_ac(m, assumelowq, apparent_power)
         elif m.mode['dcpf']:
             m = add_transmission_dc(m)
         else:
@@ -437,11 +563,14 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
     # DSM mode and add_dsm call removed - demand side management functionality no longer needed
     if m.mode['bsp']:
         m = add_buy_sell_price(m)
+        if m.mode['sweep']:
+            m = add_sweep_prices(m)
     if m.mode['tdy']:
         if m.mode['tsam']:
             store_typeperiod_parameter(m, hoursPerPeriod, weighting_order)
 
         m = add_typeperiod(m, hoursPerPeriod)
+        m = add_timestep_weights(m)
 
     if (m.mode['tve'] or m.mode['onoff'] or  m.mode['ava'] or m.mode['minfraction']):
         m = add_advanced_processes(m)
@@ -514,44 +643,113 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
     m.pro_partial_input_tuples:             empty commodities with partial input ratio
     m.pro_partial_output_tuples:            empty commodities with partial output ratio
     '''
+
+    # fix cable/ONT options too small for the load behind their line section
+    if propagate_bounds and m.mode['tra'] and m.mode['acpf']:
+        propagate_cable_bounds(m)
         
+    # commodity balance as expression object, built once and shared by the
+    # vertex, environmental and CO2 rules
+    m.com_balance_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.com,
+        initialize=[(stf, sit, com)
+                    for (stf, sit, com, com_type) in m.com_tuples
+                    if com not in m.com_supim],
+        doc='Combinations of commodities with a balance, e.g. (2020,Mid,Elec)')
+    m.com_balance = pyomo.Expression(
+        m.tm, m.com_balance_tuples,
+        rule=def_commodity_balance_rule,
+        doc='consumed (positive) or provided (negative) commodity flow')
+
+    # materialized constraint index sets, so that rules are only called for
+    # entries that produce a row (no Constraint.Skip, no lazy set differences)
+    m.com_vertex_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.com * m.com_type,
+        initialize=[(stf, sit, com, com_type)
+                    for (stf, sit, com, com_type) in m.com_tuples
+                    if com not in m.com_env and com not in m.com_supim],
+        doc='Commodities with a vertex rule (all except Env and SupIm)')
+    m.com_env_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.com * m.com_type,
+        initialize=[(stf, sit, com, com_type)
+                    for (stf, sit, com, com_type) in m.com_tuples
+                    if com in m.com_env],
+        doc='Environmental commodities, e.g. (2020,Mid,CO2,Env)')
+    m.pro_supim_input_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.pro * m.com,
+        initialize=[(stf, sit, pro, com)
+                    for (stf, sit, pro, com) in m.pro_input_tuples
+                    if com in m.com_supim],
+        doc='SupIm commodities consumed by process by site, '
+            'e.g. (2020,Mid,PV,Solar)')
+    non_const_input = (set(m.pro_partial_input_tuples) |
+                       set(m.pro_on_off_input_tuples) |
+                       set(m.pro_partial_on_off_input_tuples))
+    m.pro_const_input_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.pro * m.com,
+        initialize=[p for p in m.pro_input_tuples
+                    if p not in non_const_input],
+        doc='Commodities consumed by process with constant input ratio')
+    non_const_output = (set(m.pro_partial_output_tuples) |
+                        set(m.pro_on_off_output_tuples) |
+                        set(m.pro_partial_on_off_output_tuples) |
+                        set(m.pro_timevar_output_tuples))
+    m.pro_const_output_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.pro * m.com,
+        initialize=[(stf, sit, pro, com)
+                    for (stf, sit, pro, com) in m.pro_output_tuples
+                    if (stf, sit, pro, com) not in non_const_output and
+                    not (com == 'electricity-reactive' and
+                         (stf, sit, pro) in m.pro_output_tuples_reactive)],
+        doc='Commodities produced by process with constant output ratio '
+            '(reactive output of power factor processes excluded)')
+    non_throughput = (set(m.pro_on_off_tuples) |
+                      set(m.pro_partial_on_off_tuples) |
+                      set(m.pro_availability_tuples))
+    m.pro_throughput_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.pro,
+        initialize=[p for p in m.pro_var_cap_tuples
+                    if p not in non_throughput],
+        doc='Processes whose throughput is limited by capacity only '
+            '(constant capacities are variable bounds of tau_pro)')
+
     # Equation declarations
     # equation bodies are defined in separate functions, referred to here by
     # their name in the "rule" keyword.
     # commodity
     m.res_vertex = pyomo.Constraint(
-        m.tm, m.com_tuples,
+        m.tm, m.com_vertex_tuples,
         rule=res_vertex_rule,
         doc='storage + transmission + process + source + buy - sell == demand')
     m.res_stock_step = pyomo.Constraint(
-        m.tm, m.com_tuples,
+        m.tm, m.com_stock_tuples,
         rule=res_stock_step_rule,
         doc='stock commodity input per step <= commodity.maxperstep')
     m.res_stock_total = pyomo.Constraint(
-        m.com_tuples,
+        m.com_stock_tuples,
         rule=res_stock_total_rule,
         doc='total stock commodity input <= commodity.max')
     m.res_env_step = pyomo.Constraint(
-        m.tm, m.com_tuples,
+        m.tm, m.com_env_tuples,
         rule=res_env_step_rule,
         doc='environmental output per step <= commodity.maxperstep')
     m.res_env_total = pyomo.Constraint(
-        m.com_tuples,
+        m.com_env_tuples,
         rule=res_env_total_rule,
         doc='total environmental commodity output <= commodity.max')
 
     # process
-    m.def_process_input = pyomo.Constraint(
-        m.tm, m.pro_input_tuples - m.pro_partial_input_tuples -
-              m.pro_on_off_input_tuples - m.pro_partial_on_off_input_tuples,
-        rule=def_process_input_rule,
-        doc='process input = process throughput * input ratio')
-    m.def_process_output = pyomo.Constraint(
-        m.tm, m.pro_output_tuples - m.pro_partial_output_tuples -
-              m.pro_on_off_output_tuples - m.pro_partial_on_off_output_tuples -
-              m.pro_timevar_output_tuples,
-        rule=def_process_output_rule,
-        doc='process output = process throughput * output ratio')
+    if m.mode['presolve']:
+        substitute_process_flows(m)
+    else:
+        m.def_process_input = pyomo.Constraint(
+            m.tm, m.pro_const_input_tuples,
+            rule=def_process_input_rule,
+            doc='process input = process throughput * input ratio')
+        m.def_process_output = pyomo.Constraint(
+            m.tm, m.pro_const_output_tuples,
+            rule=def_process_output_rule,
+            doc='process output = process throughput * output ratio')
 
     # upper reactive power generation limit
     m.def_process_output_reactive1 = pyomo.Constraint(
@@ -566,11 +764,11 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
         doc='Q >= P * -tan(phi_min)')
 
     m.def_intermittent_supply = pyomo.Constraint(
-        m.tm, m.pro_input_tuples,
+        m.tm, m.pro_supim_input_tuples,
         rule=def_intermittent_supply_rule,
         doc='process output = process capacity * supim timeseries')
     m.res_process_throughput_by_capacity = pyomo.Constraint(
-        m.tm, m.pro_tuples - m.pro_on_off_tuples - m.pro_partial_on_off_tuples - m.pro_availability_tuples,
+        m.tm, m.pro_throughput_tuples,
         rule=res_process_throughput_by_capacity_rule,
         doc='process throughput <= total process capacity')
 
@@ -584,7 +782,7 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
         doc='throughput may not increase faster than maximal ramp up gradient')
 
     m.res_process_capacity = pyomo.Constraint(
-        m.pro_tuples,
+        m.pro_var_cap_tuples,
         rule=res_process_capacity_rule,
         doc='process.cap-lo <= total process capacity <= process.cap-up')
 
@@ -682,6 +880,9 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
     if dual:
         m.dual = pyomo.Suffix(direction=pyomo.Suffix.IMPORT)
 
+    if m.mode['sweep']:
+        restore_sweep_values(m)
+
     return m
 
 
@@ -689,16 +890,18 @@ def create_model(data, dt=1, timesteps=None, objective='cost', hoursPerPeriod=No
 
 # commodity
 
+# commodity balance (for m.com_balance expression)
+def def_commodity_balance_rule(m, tm, stf, sit, com):
+    return commodity_balance(m, tm, stf, sit, com)
+
+
 # vertex equation: calculate balance for given commodity and site;
 # contains implicit constraints for process activity, import/export and
 # storage activity (calculated by function commodity_balance);
 # contains implicit constraint for stock commodity source term
 def res_vertex_rule(m, tm, stf, sit, com, com_type):
-    # environmental or supim commodities don't have this constraint (yet)
-    if com in m.com_env:
-        return pyomo.Constraint.Skip
-    if com in m.com_supim:
-        return pyomo.Constraint.Skip
+    # environmental or supim commodities don't have this constraint (yet),
+    # they are not part of m.com_vertex_tuples
 
     # helper function commodity_balance calculates balance from input to
     # and output from processes, storage and transmission.
@@ -706,7 +909,7 @@ def res_vertex_rule(m, tm, stf, sit, com, com_type):
     #                       amount of commodity com
     # if power_surplus < 0: production/storage/exports consume a net
     #                       amount of the commodity com
-    power_surplus = - commodity_balance(m, tm, stf, sit, com)
+    power_surplus = - m.com_balance[tm, stf, sit, com]
 
     # if com is a stock commodity, the commodity source term e_co_stock
     # can supply a possibly negative power_surplus
@@ -739,28 +942,21 @@ def res_vertex_rule(m, tm, stf, sit, com, com_type):
 
 
 def res_stock_step_rule(m, tm, stf, sit, com, com_type):
-    if (com not in m.com_stock) and (com not in m.com_demand):
-        return pyomo.Constraint.Skip
-    else:
-        return (m.e_co_stock[tm, stf, sit, com, com_type] <=
-                m.dt * m.commodity_dict['maxperhour']
-                [(stf, sit, com, com_type)])
+    return (m.e_co_stock[tm, stf, sit, com, com_type] <=
+            m.dt * m.commodity_dict['maxperhour']
+            [(stf, sit, com, com_type)])
 
 
 # limit stock commodity use in total (scaled to annual consumption, thanks
 # to m.weight)
 def res_stock_total_rule(m, stf, sit, com, com_type):
-    if (com not in m.com_stock) and (com not in m.com_demand):
-        return pyomo.Constraint.Skip
-    else:
-        # calculate total consumption of commodity com
-        total_consumption = 0
-        for tm in m.tm:
-            total_consumption += (
-                    m.e_co_stock[tm, stf, sit, com, com_type] * m.typeperiod['weight_typeperiod'][(stf, tm)])
-        total_consumption *= m.weight
-        return (total_consumption <=
-                m.commodity_dict['max'][(stf, sit, com, com_type)])
+    # calculate total consumption of commodity com
+    weights = timestep_weights(m, stf)
+    total_consumption = pyomo.quicksum(
+        m.e_co_stock[tm, stf, sit, com, com_type] * weights[tm]
+        for tm in m.tm if weights[tm] != 0)
+    return (total_consumption <=
+            m.commodity_dict['max'][(stf, sit, com, com_type)])
 
 
 # environmental commodity creation == - commodity_balance of that commodity
@@ -768,28 +964,22 @@ def res_stock_total_rule(m, stf, sit, com, com_type):
 # any process activity;
 # limit environmental commodity output per time step
 def res_env_step_rule(m, tm, stf, sit, com, com_type):
-    if com not in m.com_env:
-        return pyomo.Constraint.Skip
-    else:
-        environmental_output = - commodity_balance(m, tm, stf, sit, com)
-        return (environmental_output <=
-                m.dt * m.commodity_dict['maxperhour']
-                [(stf, sit, com, com_type)])
+    environmental_output = - m.com_balance[tm, stf, sit, com]
+    return (environmental_output <=
+            m.dt * m.commodity_dict['maxperhour']
+            [(stf, sit, com, com_type)])
 
 
 # limit environmental commodity output in total (scaled to annual
 # emissions, thanks to m.weight)
 def res_env_total_rule(m, stf, sit, com, com_type):
-    if com not in m.com_env:
-        return pyomo.Constraint.Skip
-    else:
-        # calculate total creation of environmental commodity com
-        env_output_sum = 0
-        for tm in m.tm:
-            env_output_sum += (- commodity_balance(m, tm, stf, sit, com) * m.typeperiod['weight_typeperiod'][(stf, tm)])
-        env_output_sum *= m.weight
-        return (env_output_sum <=
-                m.commodity_dict['max'][(stf, sit, com, com_type)])
+    # calculate total creation of environmental commodity com
+    weights = timestep_weights(m, stf)
+    env_output_sum = pyomo.quicksum(
+        - m.com_balance[tm, stf, sit, com] * weights[tm]
+        for tm in m.tm if weights[tm] != 0)
+    return (env_output_sum <=
+            m.commodity_dict['max'][(stf, sit, com, com_type)])
 
 
 # process
@@ -820,8 +1010,7 @@ def def_process_capacity_rule(m, stf, sit, pro):
             - sum(m.cap_decommissioned[stf_dec, sit, pro] for stf_dec in m.stf if stf_dec <= stf if stf_dec > min(m.stf)
                   if (stf_dec, sit, pro) in m.pro_decom_cap_dict)
     else:  # operational mode of function
-        #if 0:  # (sit, pro, stf) in m.pro_const_cap_dict:
-        if (stf, sit, pro) in m.pro_const_cap_dict:
+        if (stf, sit, pro) in m.pro_const_cap_tuples:
             cap_pro = m.process_dict['inst-cap'][(stf, sit, pro)]
             print("no cap new")
         else:
@@ -842,12 +1031,32 @@ def def_process_input_rule(m, tm, stf, sit, pro, com):
 
 
 # process output power = process throughput * output ratio
+# (reactive output of power factor processes is bound by the reactive rules)
 def def_process_output_rule(m, tm, stf, sit, pro, com):
-    if com == 'electricity-reactive' and (stf, sit, pro) in m.pro_output_tuples_reactive:
-        return pyomo.Constraint.Skip
-    else:
-        return (m.e_pro_out[tm, stf, sit, pro, com] ==
-                m.tau_pro[tm, stf, sit, pro] * m.r_out_dict[(stf, pro, com)])
+    return (m.e_pro_out[tm, stf, sit, pro, com] ==
+            m.tau_pro[tm, stf, sit, pro] * m.r_out_dict[(stf, pro, com)])
+
+
+# presolve: fixed ratio process flows are substituted by
+# process throughput * ratio, all other flows are free variables
+def substitute_process_flows(m):
+    const_input = set(m.pro_const_input_tuples)
+    const_output = set(m.pro_const_output_tuples)
+    for tm in m.tm:
+        for (stf, sit, pro, com) in m.pro_input_tuples:
+            if (stf, sit, pro, com) in const_input:
+                m.e_pro_in[tm, stf, sit, pro, com] = (
+                    m.tau_pro[tm, stf, sit, pro] * m.r_in_dict[(stf, pro, com)])
+            else:
+                m.e_pro_in[tm, stf, sit, pro, com] = \
+                    m.e_pro_in_free[tm, stf, sit, pro, com]
+        for (stf, sit, pro, com) in m.pro_output_tuples:
+            if (stf, sit, pro, com) in const_output:
+                m.e_pro_out[tm, stf, sit, pro, com] = (
+                    m.tau_pro[tm, stf, sit, pro] * m.r_out_dict[(stf, pro, com)])
+            else:
+                m.e_pro_out[tm, stf, sit, pro, com] = \
+                    m.e_pro_out_free[tm, stf, sit, pro, com]
 
 
 # rules relating reactive to active power generation with predefined power factors
@@ -867,12 +1076,18 @@ def def_process_output_reactive_rule2(m, tm, stf, sit, pro):
 
 # process input (for supim commodity) = process capacity * timeseries
 def def_intermittent_supply_rule(m, tm, stf, sit, pro, coin):
-    if coin in m.com_supim:
-        return (m.e_pro_in[tm, stf, sit, pro, coin] ==
-                m.cap_pro[stf, sit, pro] * m.supim_dict[(sit, coin)]
-                [(stf, tm)] * m.dt)
-    else:
-        return pyomo.Constraint.Skip
+    return (m.e_pro_in[tm, stf, sit, pro, coin] ==
+            m.cap_pro[stf, sit, pro] * m.supim_dict[(sit, coin)]
+            [(stf, tm)] * m.dt)
+
+
+# process throughput <= constant process capacity as variable bound
+# (implied by the on/off and availability rules as well)
+def tau_pro_bounds_rule(m, t, stf, sit, pro):
+    if t in m.tm and (stf, sit, pro) in m.pro_const_cap_tuples:
+        return (0, m.dt.value *
+                m.process_dict['inst-cap'][(stf, sit, pro)])
+    return (0, None)
 
 
 # process throughput <= process capacity
@@ -948,12 +1163,13 @@ def res_global_co2_limit_rule(m, stf):
         return pyomo.Constraint.Skip
     elif m.global_prop_dict['value'][stf, 'CO2 limit'] >= 0:
         co2_output_sum = 0
+        sites = co2_sites(m, stf)
         for tm in m.tm:
-            for sit in m.sit:
+            for sit in sites:
                 # minus because negative commodity_balance represents creation
                 # of that commodity.
                 co2_output_sum += (
-                        - commodity_balance(m, tm, stf, sit, 'CO2') * m.typeperiod['weight_typeperiod'][(stf, tm)])
+                        - m.com_balance[tm, stf, sit, 'CO2'] * m.typeperiod['weight_typeperiod'][(stf, tm)])
 
         # scaling to annual output (cf. definition of m.weight)
         co2_output_sum *= m.weight
@@ -970,12 +1186,13 @@ def res_global_co2_budget_rule(m):
     elif (m.global_prop_dict['value'][min(m.stf_list), 'CO2 budget']) >= 0:
         co2_output_sum = 0
         for stf in m.stf:
+            sites = co2_sites(m, stf)
             for tm in m.tm:
-                for sit in m.sit:
+                for sit in sites:
                     # minus because negative commodity_balance represents
                     # creation of that commodity.
-                    co2_output_sum += (- commodity_balance
-                    (m, tm, stf, sit, 'CO2') *
+                    co2_output_sum += (- m.com_balance
+                    [tm, stf, sit, 'CO2'] *
                                        m.typeperiod['weight_typeperiod'][(stf, tm)] *
                                        m.weight *
                                        stf_dist(stf, m))
@@ -1071,12 +1288,11 @@ def def_costs_rule(m, cost_type):
         return m.costs[cost_type] == cost
 
     elif cost_type == 'Variable':
-        cost = \
-            sum(m.tau_pro[(tm,) + p] * m.weight * m.typeperiod['weight_typeperiod'][(m.stf_list[0], tm)] *
-                m.process_dict['var-cost'][p] *
-                m.process_dict['cost_factor'][p]
-                for tm in m.tm
-                for p in m.pro_tuples)
+        cost = weighted_timestep_sum(
+            m, m.tau_pro, m.pro_tuples,
+            lambda p: (m.process_dict['var-cost'][p] *
+                       m.process_dict['cost_factor'][p]),
+            timestep_weights(m, m.stf_list[0]))
         if m.mode['tra']:
             cost += transmission_cost(m, cost_type)
         if m.mode['sto']:
@@ -1084,12 +1300,12 @@ def def_costs_rule(m, cost_type):
         return m.costs[cost_type] == cost
 
     elif cost_type == 'Fuel':
-        return m.costs[cost_type] == sum(
-            m.e_co_stock[(tm,) + c] * m.weight * m.typeperiod['weight_typeperiod'][(m.stf_list[0], tm)] *
-            m.commodity_dict['price'][c] *
-            m.commodity_dict['cost_factor'][c]
-            for tm in m.tm for c in m.com_tuples
-            if c[2] in m.com_stock)
+        return m.costs[cost_type] == weighted_timestep_sum(
+            m, m.e_co_stock,
+            [c for c in m.com_stock_tuples if c[2] in m.com_stock],
+            lambda c: (m.commodity_dict['price'][c] *
+                       m.commodity_dict['cost_factor'][c]),
+            timestep_weights(m, m.stf_list[0]))
 
     elif cost_type == 'Start-up':
         if m.mode['onoff']:
@@ -1103,14 +1319,15 @@ def def_costs_rule(m, cost_type):
             return m.costs[cost_type] == 0
 
     elif cost_type == 'Environmental':
-        return m.costs[cost_type] == sum(
-            - commodity_balance(m, tm, stf, sit, com) * m.weight * m.typeperiod['weight_typeperiod'][
-                (m.stf_list[0], tm)] *
-            m.commodity_dict['price'][(stf, sit, com, com_type)] *
-            m.commodity_dict['cost_factor'][(stf, sit, com, com_type)]
-            for tm in m.tm
-            for stf, sit, com, com_type in m.com_tuples
-            if com in m.com_env)
+        weights = timestep_weights(m, m.stf_list[0])
+        env_prices = [((stf, sit, com),
+                       - m.commodity_dict['price'][(stf, sit, com, com_type)] *
+                       m.commodity_dict['cost_factor'][(stf, sit, com, com_type)])
+                      for stf, sit, com, com_type in m.com_env_tuples]
+        return m.costs[cost_type] == pyomo.quicksum(
+            m.com_balance[(tm,) + c] * (price * weights[tm])
+            for c, price in env_prices if not is_zero(price)
+            for tm in m.tm if weights[tm] != 0)
 
     # Revenue and Purchase costs defined in BuySellPrice.py
     elif cost_type == 'Revenue':
@@ -1140,16 +1357,24 @@ def cost_rule(m):
 def co2_rule(m):
     co2_output_sum = 0
     for stf in m.stf:
+        sites = co2_sites(m, stf)
         for tm in m.tm:
-            for sit in m.sit:
+            for sit in sites:
                 # minus because negative commodity_balance represents
                 # creation of that commodity.
                 if m.mode['int']:
-                    co2_output_sum += (- commodity_balance(m, tm, stf, sit, 'CO2') *
+                    co2_output_sum += (- m.com_balance[tm, stf, sit, 'CO2'] *
                                        m.typeperiod['weight_typeperiod'][(stf, tm)] *
                                        m.weight * stf_dist(stf, m))
                 else:
-                    co2_output_sum += (- commodity_balance(m, tm, stf, sit, 'CO2') *
+                    co2_output_sum += (- m.com_balance[tm, stf, sit, 'CO2'] *
                                        m.weight)
 
     return (co2_output_sum)
+
+
+# sites with a CO2 balance; validate_input ensures that no process uses CO2
+# at a site without the commodity, so other sites contribute nothing
+def co2_sites(m, stf):
+    return [sit for (st, sit, com) in m.com_balance_tuples
+            if st == stf and com == 'CO2']
@@ -0,0 +1,131 @@
+"""On-disk cache of built models.
+
+Building the pyomo model of a large grid takes minutes,
+re-running the same grid and scenario (e.g. after a crash in the reporting,
+or with other solver settings) rebuilds the identical model. The built
+model is therefore pickled to a cache directory under a fingerprint of
+everything it is built from: the prepared data dict, the timesteps, dt, the
+build options and the source code of the urbs package, so that a changed
+input or model formulation never hits a stale entry.
+
+    key = model_fingerprint(data, timesteps, dt, options)
+    prob = load_cached_model(cache_dir, key)
+    if prob is None:
+        prob = create_model(data, ...)
+        store_cached_model(cache_dir, key, prob)
+"""
+import os
+import glob
+import pickle
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+
+# bump to invalidate all entries when the pickled layout changes
+CACHE_VERSION = 1
+
+
+def hash_object(h, obj):
+    """Feed obj (nested dicts/lists of DataFrames, arrays and scalars) into
+    the hashlib object h."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        columns = list(obj.columns) if isinstance(obj, pd.DataFrame) else []
+        h.update(repr((type(obj).__name__, obj.shape, list(obj.index.names),
+                       columns, [str(t) for t in np.atleast_1d(obj.dtypes)])
+                      ).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, pd.Index):
+        h.update(pd.util.hash_pandas_object(obj).values.tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(repr((obj.dtype.str, obj.shape)).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        h.update(b'{')
+        for key in sorted(obj, key=repr):
+            h.update(repr(key).encode())
+            hash_object(h, obj[key])
+        h.update(b'}')
+    elif isinstance(obj, (list, tuple, range)):
+        h.update(b'[')
+        for item in obj:
+            hash_object(h, item)
+        h.update(b']')
+    else:
+        h.update(repr(obj).encode())
+
+
+def source_fingerprint():
+    """Hash of the source files of the urbs package."""
+    h = hashlib.sha256()
+    package = os.path.dirname(os.path.abspath(__file__))
+    for filename in sorted(glob.glob(os.path.join(package, '**', '*.py'),
+                                     recursive=True)):
+        h.update(os.path.relpath(filename, package).encode())
+        with open(filename, 'rb') as source:
+            h.update(source.read())
+    return h.hexdigest()
+
+
+def model_fingerprint(data, timesteps, dt, options):
+    """Structural fingerprint of a model build.
+
+    Args:
+        - data: the prepared input data dict passed to create_model
+        - timesteps: the modelled timesteps
+        - dt: timestep duration in hours
+        - options: dict of the other build arguments (mode flags,
+          weighting_order, apparent_power, ...)
+
+    Returns:
+        hex digest used as cache key
+    """
+    h = hashlib.sha256()
+    h.update('urbs model cache {}'.format(CACHE_VERSION).encode())
+    h.update(source_fingerprint().encode())
+    hash_object(h, data)
+    hash_object(h, list(timesteps))
+    hash_object(h, dt)
+    hash_object(h, options)
+    return h.hexdigest()
+
+
+def cached_model_path(cache_dir, key):
+    """Path of the cache entry of key."""
+    return os.path.join(cache_dir, '{}.pkl'.format(key))
+
+
+def load_cached_model(cache_dir, key):
+    """Built model stored under key in cache_dir, None on a miss."""
+    path = cached_model_path(cache_dir, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as cached:
+            prob = pickle.load(cached)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError,
+            ImportError) as err:
+        print('Model cache: ignoring unreadable entry {} ({})'
+              .format(path, err))
+        return None
+    print('Model cache: loaded built model {}'.format(path))
+    return prob
+
+
+def store_cached_model(cache_dir, key, prob):
+    """Pickle the built (unsolved) model prob to cache_dir under key.
+
+    The file is written under a temporary name and renamed, so parallel runs
+    never read a partial entry.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cached_model_path(cache_dir, key)
+    handle, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as cached:
+            pickle.dump(prob, cached, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    print('Model cache: stored built model {}'.format(path))
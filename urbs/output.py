@@ -137,11 +137,16 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
     other_sites = (get_input(instance, 'site')
                    .xs(stf, level='support_timeframe').index.difference(sites))
 
+    # reactive power flows on the ac electricity lines
+    tra_com, tra_in, tra_out = com, 'e_tra_in', 'e_tra_out'
+    if com == 'electricity-reactive' and instance.mode['acpf']:
+        tra_com, tra_in, tra_out = 'electricity', 'e_tra_q_in', 'e_tra_q_out'
+
     # if commodity is transportable
     try:
         df_transmission = get_input(instance, 'transmission')
-        if com in set(df_transmission.index.get_level_values('Commodity')):
-            imported = get_entity(instance, 'e_tra_out')
+        if tra_com in set(df_transmission.index.get_level_values('Commodity')):
+            imported = get_entity(instance, tra_out)
             # avoid negative value import for DCPF transmissions
             if instance.mode['dcpf']:
                 # -0.01 to avoid numerical errors such as -0
@@ -150,7 +155,7 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
                 imported = imported[imported >= 0]
                 imported = pd.concat([imported, minus_imported])
             imported = imported.loc[timesteps].xs(
-                [stf, com], level=['stf', 'com'])
+                [stf, tra_com], level=['stf', 'com'])
             imported = imported.unstack(level='tra').sum(axis=1)
             imported = imported.unstack(
                 level='sit_')[sites].fillna(0).sum(
@@ -164,7 +169,7 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
                 imported = imported[other_sites]  # ...from other_sites
             imported = drop_all_zero_columns(imported.fillna(0))
 
-            exported = get_entity(instance, 'e_tra_in')
+            exported = get_entity(instance, tra_in)
             # avoid negative value export for DCPF transmissions
             if instance.mode['dcpf']:
                 # -0.01 to avoid numerical errors such as -0
@@ -173,7 +178,7 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
                 exported = exported[exported >= 0]
                 exported = pd.concat([exported, minus_exported])
             exported = exported.loc[timesteps].xs(
-                [stf, com], level=['stf', 'com'])
+                [stf, tra_com], level=['stf', 'com'])
             exported = exported.unstack(level='tra').sum(axis=1)
             exported = exported.unstack(
                 level='sit')[sites].fillna(0).sum(
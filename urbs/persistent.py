@@ -0,0 +1,222 @@
+"""Persistent solver interfaces.
+
+The lazy line loading and voltage band loops and the scenario sweeps solve
+the same model again and again after small changes: a few added rows or
+new values of the mutable sweep Params. The shell interfaces
+(SolverFactory('gurobi'), 'cplex', ...) write, read and presolve the whole
+model for every solve. PersistentModel keeps the model loaded in a
+persistent interface and only pushes the changes before each solve, so the
+solver reuses its model and, with warmstart, its last solution.
+
+The added rows are registered by add_rows, the model is not rescanned:
+
+    - APPSI interfaces (appsi_highs, appsi_gurobi, ...) get the added rows
+      by add_constraints and update the values of the mutable Params
+      themselves (update_params), their scan of the whole model for other
+      changes is switched off
+    - the persistent interfaces gurobi_persistent, cplex_persistent and
+      xpress_persistent are loaded by set_instance on the first solve and
+      get the added rows by add_constraint; the rows, the objective and the
+      variable bounds using changed mutable Params are pushed again
+
+Rows removed from the model and added variables need a new PersistentModel.
+
+    persistent = PersistentModel(SolverFactory('gurobi_persistent'), prob)
+    persistent.solve(tee=True)
+    persistent.add_rows(add_line_loading_rows(prob, line_loading_violations(prob)))
+    persistent.solve(tee=True, warmstart=True)
+"""
+import pyomo.environ as pyomo
+from pyomo.common.collections import ComponentMap, ComponentSet
+from pyomo.core.expr.numvalue import is_constant
+from pyomo.core.expr.visitor import identify_mutable_parameters
+from pyomo.solvers.plugins.solvers.persistent_solver import PersistentSolver
+from pyomo.contrib.appsi.base import LegacySolverInterface
+
+# persistent interface of the solver names accepted by run_lvds_opt
+PERSISTENT_SOLVERS = {
+    'gurobi': 'gurobi_persistent',
+    'gurobi_direct': 'gurobi_persistent',
+    'cplex': 'cplex_persistent',
+    'cplex_direct': 'cplex_persistent',
+    'xpress': 'xpress_persistent',
+    'xpress_direct': 'xpress_persistent',
+    'highs': 'appsi_highs',
+    'ipopt': 'appsi_ipopt',
+    'cbc': 'appsi_cbc'}
+
+
+def persistent_solver_name(solver_name):
+    """Name of the persistent interface of solver_name, e.g. 'gurobi' ->
+    'gurobi_persistent'. Names of persistent interfaces are returned
+    unchanged."""
+    return PERSISTENT_SOLVERS.get(solver_name, solver_name)
+
+
+def is_persistent(optim):
+    """True if optim is a persistent or an APPSI solver interface."""
+    return isinstance(optim, (PersistentSolver, LegacySolverInterface))
+
+
+# checks of the whole model by APPSI interfaces before each solve, the
+# changes are pushed by PersistentModel instead
+APPSI_SCANS = ('check_for_new_or_removed_constraints',
+               'check_for_new_or_removed_vars',
+               'check_for_new_or_removed_params', 'check_for_new_objective',
+               'update_constraints', 'update_vars', 'update_named_expressions',
+               'update_objective')
+
+
+def row_objects(m):
+    """Active constraint and SOS constraint data objects of m."""
+    return m.component_data_objects((pyomo.Constraint, pyomo.SOSConstraint),
+                                    active=True, descend_into=True)
+
+
+class PersistentModel(object):
+    """A model kept loaded in a persistent solver interface, c.f. the module
+    docstring.
+
+    Attributes:
+        - optim: the persistent solver interface
+        - m: the pyomo model
+    """
+
+    def __init__(self, optim, m):
+        if not is_persistent(optim):
+            raise ValueError('{} is no persistent solver interface, c.f. '
+                             'persistent_solver_name'.format(type(optim).__name__))
+        self.optim = optim
+        self.m = m
+        self._loaded = False
+        self._rows = []                 # rows added since the last solve
+        self._params = ComponentMap()   # mutable param -> value as loaded
+        self._rows_of = None            # mutable param -> rows using it
+        self._bounded = []              # variables with mutable Param bounds
+        if isinstance(optim, LegacySolverInterface):
+            for scan in APPSI_SCANS:
+                setattr(optim.update_config, scan, False)
+
+    def add_rows(self, rows):
+        """Register rows added to the model since the last solve, e.g. the
+        rows returned by add_line_loading_rows, they are pushed to the
+        solver by the next solve.
+
+        Args:
+            - rows: constraint or SOS constraint data objects
+        """
+        self._rows.extend(rows)
+
+    def solve(self, **kwargs):
+        """Push the changes of the model since the last solve and solve it.
+
+        Args:
+            - kwargs: options of optim.solve, e.g. tee, warmstart
+
+        Returns:
+            the solver results
+        """
+        if self._loaded:
+            self.update()
+        elif isinstance(self.optim, PersistentSolver):
+            self.load()
+        self._rows = []
+        result = self.optim.solve(self.m, **kwargs)
+        self._loaded = True
+        return result
+
+    def load(self):
+        """Load the whole model into the solver (set_instance)."""
+        self.optim.set_instance(self.m)
+        self._params = ComponentMap(
+            (param, param.value) for param in self.mutable_params())
+        self._rows_of = None
+        self._bounded = [
+            var for var in self.m.component_data_objects(pyomo.Var,
+                                                         descend_into=True)
+            if not (is_constant(var.lower) and is_constant(var.upper))]
+
+    def update(self):
+        """Push the rows registered by add_rows and, for the persistent
+        interfaces, the rows, objective and variable bounds using changed
+        mutable Params to the solver.
+
+        Returns:
+            dict of the number of added rows and of rows and variables
+            updated for changed Params
+        """
+        optim = self.optim
+        rows = [row for row in self._rows
+                if row.ctype is not pyomo.SOSConstraint]
+        sos = [row for row in self._rows if row.ctype is pyomo.SOSConstraint]
+        counts = {'rows added': len(self._rows), 'rows updated': 0,
+                  'vars updated': 0}
+
+        if isinstance(optim, LegacySolverInterface):
+            # the Param values are updated by the solve of the interface
+            optim.add_constraints(rows)
+            optim.add_sos_constraints(sos)
+        else:
+            # rows using a mutable Param with a changed value are re-added,
+            # before the new rows, which use the current values already
+            changed = [param for param in self.mutable_params()
+                       if self._params[param] != param.value]
+            if changed:
+                added = ComponentSet(self._rows)
+                stale = ComponentSet()
+                rows_of = self.rows_of_params()
+                for param in changed:
+                    stale.update(rows_of.get(param, ()))
+                    self._params[param] = param.value
+                objective = self.active_objective()
+                for row in stale:
+                    if row is objective or row in added:
+                        continue
+                    optim.remove_constraint(row)
+                    optim.add_constraint(row)
+                    counts['rows updated'] += 1
+                if objective in stale:
+                    optim.set_objective(objective)
+                for var in self._bounded:
+                    optim.update_var(var)
+                counts['vars updated'] = len(self._bounded)
+            for row in rows:
+                optim.add_constraint(row)
+                self.register_row(row)
+            for row in sos:
+                optim.add_sos_constraint(row)
+
+        if any(counts.values()):
+            print('Persistent solver update: ' + ', '.join(
+                '{} {}'.format(number, what)
+                for what, number in counts.items() if number))
+        return counts
+
+    def active_objective(self):
+        return next(self.m.component_data_objects(pyomo.Objective,
+                                                  active=True,
+                                                  descend_into=True))
+
+    def mutable_params(self):
+        return (param
+                for component in self.m.component_objects(pyomo.Param,
+                                                          descend_into=True)
+                if component.mutable
+                for param in component.values())
+
+    def rows_of_params(self):
+        """Map of the mutable Params to the rows and objective using them,
+        collected on the first Param change (models without sweep Params
+        never pay for it)."""
+        if self._rows_of is None:
+            self._rows_of = ComponentMap()
+            for row in row_objects(self.m):
+                self.register_row(row)
+            self.register_row(self.active_objective())
+        return self._rows_of
+
+    def register_row(self, row):
+        if self._rows_of is None or row.ctype is pyomo.SOSConstraint:
+            return
+        for param in identify_mutable_parameters(row.expr):
+            self._rows_of.setdefault(param, ComponentSet()).add(row)
@@ -0,0 +1,213 @@
+"""Build profiler of the pyomo model.
+
+BuildProfiler records the construction of every pyomo component added to a
+model while it is active (Set, Param, Var, Constraint, Expression, ... of
+create_model and the features): wall time, calls of the rules (counted by
+wrapping the rule functions during the construction), rows or columns
+created, rows skipped by the rule and the change of the resident memory.
+Components of sub-blocks are summed per component name, e.g.
+'block.res_vertex'.
+
+    with BuildProfiler() as profiler:
+        prob = create_model(data, ...)
+    profiler.report('result/build_profile.json')
+"""
+import os
+import sys
+import json
+import time
+import pyomo.environ as pyomo
+from pyomo.core.base.block import BlockData
+
+
+def current_rss():
+    """Resident memory of this process in bytes (None if unknown)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # peak instead of current memory, kB on linux but bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def declaration_site():
+    """file:line of the model code declaring the current component."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (os.sep + 'pyomo' + os.sep not in filename and
+                filename != __file__):
+            return '{}:{}'.format(os.path.basename(filename), frame.f_lineno)
+        frame = frame.f_back
+    return None
+
+
+# rule initializers of the components: rule (Constraint, Expression, Param,
+# Objective, ...) and the initialize, bounds and domain rules of a Var
+RULES = ('_rule', '_rule_init', '_rule_bounds', '_rule_domain')
+
+
+class RuleCalls(object):
+    """Counts the calls of the rule functions of a component while the
+    wrappers are in place (until restore).
+
+    Attributes:
+        - calls: number of calls so far
+    """
+
+    def __init__(self, component):
+        self.calls = 0
+        self._wrapped = []
+        for attr in RULES:
+            rule = getattr(component, attr, None)
+            # bounds and domain rules are wrapped in a further initializer
+            rule = getattr(rule, '_initializer', getattr(rule, '_set', rule))
+            function = getattr(rule, '_fcn', None)
+            if callable(function):
+                self._wrapped.append((rule, function))
+                rule._fcn = self._counted(function)
+
+    def _counted(self, function):
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return function(*args, **kwargs)
+        return counted
+
+    def restore(self):
+        """Put the original rule functions back."""
+        for rule, function in self._wrapped:
+            rule._fcn = function
+        self._wrapped = []
+
+
+def component_counts(component):
+    """Rows or columns created and rows skipped of a component.
+
+    Rows the rule skipped (Constraint.Skip) are the indices without
+    component data.
+    """
+    created = len(component)
+    indices = (len(component.index_set()) if component.is_indexed()
+               else 1)
+    skipped = (indices - created
+               if component.ctype in (pyomo.Constraint, pyomo.Objective)
+               else 0)
+    return created, skipped
+
+
+class BuildProfiler(object):
+    """Context manager recording the component construction of pyomo
+    models, c.f. the module docstring.
+
+    Attributes:
+        - records: dict of name to the summed record of the component
+        - wall: wall time of the whole block, including the data
+          preparation outside of components
+
+    The time and memory of a component exclude the components declared
+    while it is constructed (its implicit index sets, block contents).
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.wall = 0
+        self._add_component = None
+        self._stack = []
+
+    def __enter__(self):
+        self._add_component = BlockData.add_component
+        profiler = self
+        original = self._add_component
+
+        def add_component(block, name, val):
+            return profiler._profile(original, block, name, val)
+
+        BlockData.add_component = add_component
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall += time.perf_counter() - self._start
+        BlockData.add_component = self._add_component
+        return False
+
+    def _profile(self, original, block, name, val):
+        # time and memory exclusive of nested components (e.g. the implicit
+        # index sets or the components of a block)
+        self._stack.append([0.0, 0])
+        calls = RuleCalls(val)
+        rss = current_rss() or 0
+        start = time.perf_counter()
+        try:
+            return original(block, name, val)
+        finally:
+            elapsed = time.perf_counter() - start
+            calls.restore()
+            grown = (current_rss() or 0) - rss
+            nested_time, nested_rss = self._stack.pop()
+            if self._stack:
+                self._stack[-1][0] += elapsed
+                self._stack[-1][1] += grown
+            self._record(block, name, val, calls.calls,
+                         elapsed - nested_time, grown - nested_rss)
+
+    def _record(self, block, name, component, calls, elapsed, rss):
+        if block.parent_block() is not None:
+            name = '{}.{}'.format(block.parent_component().local_name, name)
+        try:
+            created, skipped = component_counts(component)
+        except (TypeError, AttributeError):
+            created, skipped = 0, 0
+        record = self.records.get(name)
+        if record is None:
+            record = self.records[name] = {
+                'name': name, 'type': component.ctype.__name__,
+                'source': declaration_site(), 'time': 0.0, 'rule_calls': 0,
+                'created': 0, 'skipped': 0, 'rss_delta': 0,
+                'declarations': 0}
+        record['time'] += elapsed
+        record['rule_calls'] += calls
+        record['created'] += created
+        record['skipped'] += skipped
+        record['rss_delta'] += rss
+        record['declarations'] += 1
+
+    def table(self, top=None):
+        """Records sorted by decreasing wall time as a list of dicts."""
+        rows = sorted(self.records.values(), key=lambda r: -r['time'])
+        return rows[:top] if top else rows
+
+    def report(self, filename=None, top=30):
+        """Print the profile table and write it to a JSON file.
+
+        Args:
+            - filename: path of the JSON file, not written if None
+            - top: number of components printed, default: 30
+
+        Returns:
+            the sorted records, c.f. table
+        """
+        rows = self.table()
+        components = sum(r['time'] for r in rows)
+        print('Model build profile: {:.2f} s wall, {:.2f} s in {} components'
+              .format(self.wall, components, len(rows)))
+        print('{:<50} {:<16} {:>8} {:>9} {:>9} {:>8} {:>9}  {}'.format(
+            'component', 'type', 'time(s)', 'calls', 'created', 'skipped',
+            'rss(MB)', 'source'))
+        for r in rows[:top]:
+            print('{:<50} {:<16} {:>8.3f} {:>9} {:>9} {:>8} {:>9.1f}  {}'
+                  .format(r['name'], r['type'], r['time'], r['rule_calls'],
+                          r['created'], r['skipped'], r['rss_delta'] / 2**20,
+                          r['source']))
+        if filename:
+            with open(filename, 'w') as out:
+                json.dump({'wall': self.wall,
+                           'components': components,
+                           'records': rows}, out, indent=1)
+        return rows
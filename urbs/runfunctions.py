@@ -5,6 +5,13 @@ import numpy as np
 
 from pyomo.environ import SolverFactory
 from .model import create_model
+from .scaling import ScaledModel
+from .profiler import BuildProfiler
+from .persistent import PersistentModel, persistent_solver_name
+from .modelcache import model_fingerprint, load_cached_model, \
+                         store_cached_model
+from contextlib import nullcontext
+from functools import partial
 from .report import *
 from .plot import *
 from .input import *
@@ -15,6 +22,7 @@ from .scenarios import *
 import os
 import multiprocessing as mp
 import random
+import copy
 import numpy as np
 import pprint
 
@@ -79,7 +87,8 @@ def setup_solver(optim, logfile='solver.log'):
     return optim
 
 def setup_solver_mip(optim, logfile='solver.log', precision='low', clusters=None, **gurobiparams):
-    if optim.name == 'gurobi':
+    name = getattr(optim, 'name', None)  # APPSI interfaces have no name
+    if name == 'gurobi' or name == 'gurobi_persistent':
         # reference with list of option names
         # http://www.gurobi.com/documentation/5.6/reference-manual/parameters
         optim.set_options("logfile={}".format(logfile))
@@ -96,7 +105,7 @@ def setup_solver_mip(optim, logfile='solver.log', precision='low', clusters=None
         if clusters is None:
             pass
 
-    if optim.name == 'cplexdirect' or optim.name == 'cplex_direct':
+    if name == 'cplexdirect' or name == 'cplex_direct' or name == 'cplex_persistent':
         optim.options['threads'] = 32
         if "MIPGap" in gurobiparams.keys():
             optim.options['mip_tolerances_mipgap'] = gurobiparams['MIPGap']
@@ -106,6 +115,33 @@ def setup_solver_mip(optim, logfile='solver.log', precision='low', clusters=None
     return optim
 # return optimizer
 
+def apply_electrification(data, electrification=1, bev_ratio=1, hp_ratio=1,
+                          pv_ratio=1, vartariff=0):
+    """Apply the electrification rate and variable tariff share of
+    run_lvds_opt to the input data (c.f. its arguments)."""
+    # user can define a percentual electrification rate (0<= electrification <<1) that removes electrification measures
+    # in random buildings
+    # alternatively, adjust pv, hp, or bev penetration individually through the variables pv_ratio, bev_ratio, hp_ratio
+
+    if electrification < 1 or pv_ratio < 1:
+        data = remove_pv_in_random(data, electrification)
+
+    if electrification < 1 or bev_ratio < 1:
+        data = unelectrify_mobility_in_random(data, electrification)
+
+    if electrification < 1 or hp_ratio < 1:
+        data = unelectrify_heat_in_random(data, electrification)
+
+    # allow participation to variable grid tariffs.  0<=vartariff<=1: share of prosumers which opt to variable tariffs.
+    if vartariff > 0:
+        random.seed(4)
+        demand_nodes = set([sit for (sit, demand) in data['demand'].columns])
+        vartariff_nodes = random.sample(demand_nodes, int(len(demand_nodes) * (vartariff)))
+        data = adopt_variable_tariffs(data, vartariff_nodes)
+
+    return data
+
+
 def run_lvds_opt(input_files, solver_name, timesteps, scenario, result_dir, dt,
                           objective,
                           report_tuples=None,
@@ -121,7 +157,20 @@ def run_lvds_opt(input_files, solver_name, timesteps, scenario, result_dir, dt,
                           bev_ratio=1,
                           hp_ratio=1,
                           pv_ratio=1,
-                          vartariff=0,): # grid_curtailment, grid_op, parallel removed
+                          vartariff=0,
+                          presolve=False,
+                          apparent_power=8,
+                          lazy_lines=False,
+                          lazy_voltage=False,
+                          radial=False,
+                          sos1=False,
+                          prune_options=False,
+                          propagate_bounds=False,
+                          scaling=False,
+                          profile_build=False,
+                          model_cache=None,
+                          sweep_points=None,
+                          persistent=False,): # grid_curtailment, grid_op, parallel removed
 
     """ run an urbs model for given input, time steps and scenario
 
@@ -141,6 +190,45 @@ def run_lvds_opt(input_files, solver_name, timesteps, scenario, result_dir, dt,
           (c.f. urbs.report)
         - report_sites_name: (optional) dict of names for sites in
           report_tuples
+        - presolve: (optional) substitute definitional equalities when
+          building the model (c.f. urbs.create_model)
+        - apparent_power: (optional) order of the apparent power polygon of
+          ac lines or 'soc' for a cone constraint (c.f. urbs.create_model)
+        - lazy_lines: (optional) start with the line loading rows of the peak
+          load timesteps and the lines at the transformer, add the violated
+          ones and re-solve until there are none (c.f. urbs.create_model)
+        - lazy_voltage: (optional) with radial, start with the voltage band
+          rows at the slack buses and feeder ends, add the violated (tm, site)
+          limits and re-solve until there are none (c.f. urbs.create_model)
+        - radial: (optional) voltage of radial ac grids as expressions of the
+          voltage drops along the path to the slack bus
+          (c.f. urbs.create_model)
+        - sos1: (optional) True/'binary' or 'continuous' to declare the
+          cable and ONT type choices as SOS1 sets (c.f. urbs.create_model)
+        - prune_options: (optional) remove dominated cable and transformer
+          options from the transmission input before building the model
+          (c.f. urbs.prune_dominated_transmission)
+        - propagate_bounds: (optional) fix cable and ONT options that are too
+          small for the peak net load behind their line section
+          (c.f. urbs.create_model)
+        - scaling: (optional) solve the model scaled by geometric mean row
+          and column scaling, the solution is unscaled (c.f. urbs.scaling)
+        - profile_build: (optional) print the build time, rule calls,
+          rows/columns and memory per model component and write them to
+          <scenario>_build_profile.json in result_dir (c.f. urbs.profiler)
+        - model_cache: (optional) directory of the built model cache; the
+          built model is stored there under a fingerprint of the prepared
+          data, timesteps, dt and build options and reloaded instead of
+          rebuilt when they recur (c.f. urbs.modelcache)
+        - sweep_points: (optional) list of dicts of electrification,
+          bev_ratio, hp_ratio, pv_ratio (and an unchanged vartariff) values;
+          the model is built once with mutable parameters for the first
+          point and re-solved for each point with updated values, saved as
+          <scenario>_sweep<i>_step1.h5 (c.f. urbs.update_sweep_parameters)
+        - persistent: (optional) solve with the persistent interface of the
+          solver (gurobi -> gurobi_persistent, highs -> appsi_highs, ...),
+          which keeps the model loaded between the lazy and sweep re-solves
+          and only receives their changes (c.f. urbs.persistent)
 
     Returns:
         the urbs model instance
@@ -154,6 +242,8 @@ def run_lvds_opt(input_files, solver_name, timesteps, scenario, result_dir, dt,
     data, cross_scenario_data = scenario(data, cross_scenario_data)     # apply scenario function to modify the data
     validate_input(data)
     validate_dc_objective(data, objective)                              # relevant for CO2 objective only
+    if prune_options:
+        prune_dominated_transmission(data)                              # dominated cable/ONT options
 
     # Removed clusters list processing - not needed for coordinated optimization
 
@@ -177,9 +267,8 @@ def run_lvds_opt(input_files, solver_name, timesteps, scenario, result_dir, dt,
     data['trafo_node'] = data['process'].query("Process == 'import'").index.get_level_values(1)[0]
     data['mainbusbar_node'] = data['process'].query("Process == 'Q_feeder_central'").index.get_level_values(1)[0]
 
-    # if distribution network has to be modeled with reactive power
-    if mode['acpf']:
-        add_reactive_transmission_lines(data)
+    # reactive power flows of the distribution network (acpf) are modeled on the
+    # transmission lines themselves, see add_transmission_ac
 
     add_reactive_output_ratios(data)
 
@@ -283,26 +372,6 @@ def run_lvds_opt(input_files, solver_name, timesteps, scenario, result_dir, dt,
             data['buy_sell_price'] = data['buy_sell_price'][data['buy_sell_price'].index.get_level_values(1).isin(timesteps)]
         # UHP timestep filtering removed - functionality no longer needed
 
-    # user can define a percentual electrification rate (0<= electrification <<1) that removes electrification measures
-    # in random buildings
-    # alternatively, adjust pv, hp, or bev penetration individually through the variables pv_ratio, bev_ratio, hp_ratio
-
-    if electrification < 1 or pv_ratio < 1:
-        data = remove_pv_in_random(data, electrification)
-
-    if electrification < 1 or bev_ratio < 1:
-        data = unelectrify_mobility_in_random(data, electrification)
-
-    if electrification < 1 or hp_ratio < 1:
-        data = unelectrify_heat_in_random(data, electrification)
-
-    # allow participation to variable grid tariffs.  0<=vartariff<=1: share of prosumers which opt to variable tariffs.
-    if vartariff > 0:
-        random.seed(4)
-        demand_nodes = set([sit for (sit, demand) in data['demand'].columns])
-        vartariff_nodes = random.sample(demand_nodes, int(len(demand_nodes) * (vartariff)))
-        data = adopt_variable_tariffs(data, vartariff_nodes)
-
     # if non-zero capacity prices (power_price_kw index in Global) are defined:
     # assign these for each site (power_price_kw column in Site) and adjust the import prices slightly to compensate
     if data['global_prop'].loc[pd.IndexSlice[:, 'power_price_kw'], 'value'].iloc[0] > 0:
@@ -318,16 +387,59 @@ def run_lvds_opt(input_files, solver_name, timesteps, scenario, result_dir, dt,
                                                            pd.IndexSlice[:, 'power_price_kw'], 'value'].iloc[
                                                            0] / kwh_per_peakkw
 
+    # electrification rate and variable tariffs (see apply_electrification); a sweep applies each of its
+    # points to a copy of the data
+    point = {'electrification': electrification, 'bev_ratio': bev_ratio,
+             'hp_ratio': hp_ratio, 'pv_ratio': pv_ratio, 'vartariff': vartariff}
+    if sweep_points:
+        sweep_base = copy.deepcopy(data)
+        data = apply_electrification(copy.deepcopy(sweep_base), **dict(point, **sweep_points[0]))
+    else:
+        data = apply_electrification(data, **point)
+
     # data is constructed finally, now to solve the HOODS-Sys problem
-    prob = create_model(data,                               # data from input_path in main 
-                        dt=dt,                              # from main
-                        timesteps=timesteps,                # from main
-                        objective='cost',                   # from main
-                        weighting_order=weighting_order,    # from run_lvds_opt()/tsam
-                        assumelowq=assumelowq,              # from main
-                        hoursPerPeriod=hoursPerPeriod,      # from main
-                        # grid_plan_model parameter removed - always use full co-optimization
-                        dual=False)
+    if persistent and scaling:
+        raise NotImplementedError('scaling solves a scaled copy of the model, '
+                                  'which is not loaded into a persistent solver')
+
+    # reload the built model of an identical earlier run from the cache
+    prob = None
+    if model_cache:
+        cache_key = model_fingerprint(data, timesteps, dt, {
+            'objective': 'cost',
+            'weighting_order': weighting_order, 'assumelowq': assumelowq,
+            'hoursPerPeriod': hoursPerPeriod, 'presolve': presolve,
+            'apparent_power': apparent_power, 'lazy_lines': lazy_lines,
+            'lazy_voltage': lazy_voltage, 'radial': radial, 'sos1': sos1,
+            'propagate_bounds': propagate_bounds,
+            'sweep': bool(sweep_points)})
+        prob = load_cached_model(model_cache, cache_key)
+
+    if prob is None:
+        profiler = BuildProfiler() if profile_build else nullcontext()
+        with profiler:
+            prob = create_model(data,                               # data from input_path in main 
+                                dt=dt,                              # from main
+                                timesteps=timesteps,                # from main
+                                objective='cost',                   # from main
+                                weighting_order=weighting_order,    # from run_lvds_opt()/tsam
+                                assumelowq=assumelowq,              # from main
+                                hoursPerPeriod=hoursPerPeriod,      # from main
+                                # grid_plan_model parameter removed - always use full co-optimization
+                                dual=False,
+                                presolve=presolve,
+                                apparent_power=apparent_power,
+                                lazy_lines=lazy_lines,
+                                lazy_voltage=lazy_voltage,
+                                radial=radial,
+                                sos1=sos1,
+                                propagate_bounds=propagate_bounds,
+                                sweep=bool(sweep_points))
+        if profile_build:
+            profiler.report(os.path.join(result_dir,
+                                         '{}_build_profile.json'.format(sce)))
+        if model_cache:
+            store_cached_model(model_cache, cache_key, prob)
 
     # write lp file # lp writing needs huge RAM capacities for bigger models
     if lp:
@@ -337,15 +449,52 @@ def run_lvds_opt(input_files, solver_name, timesteps, scenario, result_dir, dt,
                                               regulation_text),
                    io_options={'symbolic_solver_labels': True})
     log_filename = os.path.join(result_dir, '{}.log').format(sce)
+    if persistent:
+        solver_name = persistent_solver_name(solver_name)
     optim = SolverFactory(solver_name)
     optim = setup_solver_mip(optim, logfile=log_filename, MIPGap=0.05, ConcurrentMIP=6, Threads=24)
-    result = optim.solve(prob, tee=True, report_timing=True)
+    # the persistent interface keeps prob loaded and the scaled copy is built
+    # once, the re-solves below only push the changes
+    if persistent:
+        persistent_model = PersistentModel(optim, prob)
+        solve = persistent_model.solve
+    elif scaling:
+        solve = ScaledModel(optim, prob).solve
+    else:
+        solve = partial(optim.solve, prob)
+    result = solve(tee=True, report_timing=True)
+
+    # lazy line loading/ voltage band: add the violated line loading rows
+    # and voltage limits and re-solve, warm started from the last
+    # solution, until nothing is violated
+    while lazy_lines or lazy_voltage:
+        added = []
+        if lazy_lines:
+            added += add_line_loading_rows(prob, line_loading_violations(prob))
+        if lazy_voltage:
+            added += add_voltage_band(prob, voltage_band_violations(prob))
+        if not added:
+            break
+        print('Lazy constraints: {} violated rows added, re-solving'.format(len(added)))
+        if persistent:
+            persistent_model.add_rows(added)
+        result = solve(tee=True, report_timing=True,
+                       warmstart=optim.warm_start_capable())
+    if lazy_lines:
+        print('Lazy line loading: {} of {} line loading rows needed'.format(
+            len(prob.tra_loading_non_ac) + len(prob.tra_loading_ac),
+            len(prob.tm) * (len(prob.tra_tuples_non_ac) + len(prob.tra_tuples_ac_cap) *
+                            len(getattr(prob, 'apparent_power_sides', [None])))))
+    if lazy_voltage:
+        print('Lazy voltage band: {} of {} voltage limits needed'.format(
+            len(prob.voltage_band), len(prob.tm) * len(prob.sit_tuples_ac)))
 
     # create h5 file label by using grid name, model type etc.
     # grid_text, paradigm_text, electrification_text = create_h5_file_labels(input_files, electrification) # lvdshelper.py
 
     # save results to h5/ HDF5 format for efficient storage
-    save(prob, os.path.join(result_dir, '{}_step1.h5'.format(sce)), manyprob=False)
+    label = '{}_sweep0'.format(sce) if sweep_points else sce
+    save(prob, os.path.join(result_dir, '{}_step1.h5'.format(label)), manyprob=False)
     # optionally create Excel reports with detailed results
     # Note: report function currently only supports Excel format, so skip if using .h5
     if xls:
@@ -358,6 +507,17 @@ def run_lvds_opt(input_files, solver_name, timesteps, scenario, result_dir, dt,
         except Exception as e:
             print(f"Warning: Could not create Excel report: {e}")
             print("Main results are saved in the .h5 file")
+
+    # scenario sweep: only the mutable parameters change, re-solve the built
+    # model warm started from the last point
+    for number, sweep_point in enumerate((sweep_points or [])[1:], 1):
+        print('Sweep point {}: {}'.format(number, sweep_point))
+        update_sweep_parameters(prob, apply_electrification(
+            copy.deepcopy(sweep_base), **dict(point, **sweep_point)))
+        result = solve(tee=True, report_timing=True,
+                       warmstart=optim.warm_start_capable())
+        save(prob, os.path.join(result_dir, '{}_sweep{}_step1.h5'.format(sce, number)),
+             manyprob=False)
                
 
         
@@ -3,6 +3,10 @@ from .pyomoio import get_entity, list_entities
 
 # removed def rename_duplicate_columns(df): uhp
 
+# entities not written to the result cache: com_balance is indexed over
+# (tm, stf, sit, com), evaluating and storing it would grow every h5 file
+RESULT_CACHE_EXCLUDE = ['com_balance']
+
 # create_result_cache used for save()
 def create_result_cache(prob):
     entity_types = ['set', 'par', 'var', 'exp']
@@ -15,6 +19,8 @@ def create_result_cache(prob):
 
     result_cache = {}
     for entity in entities:
+        if entity in RESULT_CACHE_EXCLUDE:
+            continue
         result_cache[entity] = get_entity(prob, entity)
     return result_cache
 
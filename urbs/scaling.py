@@ -0,0 +1,250 @@
+"""Row and column scaling of the model coefficients.
+
+The kW flows, kV^2 voltages, EUR/kWh prices and annuity factors of the model
+span several orders of magnitude in one constraint matrix. The scaling
+factors are computed from the assembled coefficients by geometric mean
+scaling: rows and columns are divided alternately by the geometric mean of
+their largest and smallest absolute coefficient. The factors are rounded to
+powers of two, so scaling adds no rounding errors. Integer columns are not
+scaled.
+
+The factors are applied to a pyomo model through the scaling_factor suffix
+and the core.scale_model transformation (scale_model). The objective is
+scaled by a power of two as well, the objective value and bound reported by
+the solver are those of the scaled objective. ScaledModel builds the scaled
+copy once and keeps it up to date with the lazy rows, variable bounds and
+sweep Params added or changed in the original model between re-solves; the
+solution is unscaled after each solve.
+
+    scaled = ScaledModel(SolverFactory('gurobi'), prob)
+    scaled.solve(tee=True)
+    add_line_loading_rows(prob, line_loading_violations(prob))
+    scaled.solve(tee=True, warmstart=True)
+"""
+import numpy as np
+import scipy.sparse as sp
+import pyomo.environ as pyomo
+from pyomo.common.collections import ComponentMap
+from pyomo.core.expr import identify_variables, replace_expressions
+from pyomo.repn import generate_standard_repn
+
+
+def geometric_mean_scaling(A, integer=None, passes=4):
+    """Row and column scaling factors of a sparse matrix.
+
+    Args:
+        - A: scipy sparse matrix of the constraint coefficients
+        - integer: optional boolean array of the integer columns, which keep
+          the factor 1
+        - passes: number of alternating row and column passes
+
+    Returns:
+        (r, s) arrays of powers of two, diag(r) * A * diag(s) is the scaled
+        matrix and x = s * x_scaled the unscaled solution
+    """
+    A = abs(sp.csr_matrix(A, dtype=float))
+    A.eliminate_zeros()
+    nrows, ncols = A.shape
+    r = np.ones(nrows)
+    s = np.ones(ncols)
+    scalable = np.ones(ncols, dtype=bool) if integer is None else ~np.asarray(integer)
+
+    def spread(B):
+        # geometric mean of the largest and smallest entry of each row of B
+        B = B.tocsr()
+        factor = np.ones(B.shape[0])
+        filled = np.diff(B.indptr) > 0
+        starts = B.indptr[:-1][filled]
+        largest = np.maximum.reduceat(B.data, starts)
+        smallest = np.minimum.reduceat(B.data, starts)
+        factor[filled] = np.sqrt(largest * smallest)
+        return factor
+
+    for _ in range(passes):
+        r /= spread(sp.diags(r) @ A @ sp.diags(s))
+        col = spread((sp.diags(r) @ A @ sp.diags(s)).T)
+        s[scalable] /= col[scalable]
+    return 2.0 ** np.round(np.log2(r)), 2.0 ** np.round(np.log2(s))
+
+
+def row_factor(coefs):
+    """Power of two that scales the geometric mean of the largest and
+    smallest absolute coefficient of a row to about 1."""
+    coefs = np.abs(np.asarray(coefs, dtype=float))
+    coefs = coefs[coefs > 0]
+    if not len(coefs):
+        return 1.0
+    return float(2.0 ** np.round(-np.log2(np.sqrt(coefs.max() * coefs.min()))))
+
+
+def scale_model(m, passes=4):
+    """Scale a pyomo model by the geometric mean scaling factors of its
+    linear constraint coefficients.
+
+    The factors are stored in the scaling_factor suffix of m (variables:
+    1 / column factor, constraints: row factor). Nonlinear constraints
+    (e.g. the apparent power cone) keep the factor 1. The objective gets
+    the row factor of its scaled cost coefficients.
+
+    Args:
+        - m: a pyomo ConcreteModel, e.g. from create_model
+        - passes: number of alternating row and column passes
+
+    Returns:
+        the scaled copy of m (core.scale_model), unscale its solution with
+        unscale_solution
+    """
+    columns = {}
+    variables = []
+    rows, cols, vals, constraints = [], [], [], []
+    for con in m.component_data_objects(pyomo.Constraint, active=True):
+        repn = generate_standard_repn(con.body, quadratic=False)
+        if not repn.is_linear():
+            continue
+        for var, coef in zip(repn.linear_vars, repn.linear_coefs):
+            if id(var) not in columns:
+                columns[id(var)] = len(variables)
+                variables.append(var)
+            rows.append(len(constraints))
+            cols.append(columns[id(var)])
+            vals.append(coef)
+        constraints.append(con)
+    A = sp.csr_matrix((vals, (rows, cols)),
+                      shape=(len(constraints), len(variables)))
+    integer = np.array([not var.is_continuous() for var in variables],
+                       dtype=bool)
+    r, s = geometric_mean_scaling(A, integer, passes)
+
+    if hasattr(m, 'scaling_factor'):
+        m.scaling_factor.clear()
+    else:
+        m.scaling_factor = pyomo.Suffix(direction=pyomo.Suffix.EXPORT)
+    for con, factor in zip(constraints, r):
+        m.scaling_factor[con] = float(factor)
+    for var, factor in zip(variables, s):
+        m.scaling_factor[var] = float(1 / factor)
+    for obj in m.component_data_objects(pyomo.Objective, active=True):
+        repn = generate_standard_repn(obj.expr, quadratic=False)
+        m.scaling_factor[obj] = row_factor(
+            [coef * s[columns[id(var)]] if id(var) in columns else coef
+             for var, coef in zip(repn.linear_vars, repn.linear_coefs)])
+    return pyomo.TransformationFactory('core.scale_model').create_using(m)
+
+
+def unscale_solution(scaled, m):
+    """Load the solution of the scaled model into m (unscaled)."""
+    pyomo.TransformationFactory('core.scale_model').propagate_solution(scaled, m)
+
+
+class ScaledModel(object):
+    """The scaled copy of a model, built once and re-solved, c.f. the module
+    docstring.
+
+    Before each solve the changes of the original model since the last
+    solve are pushed to the copy: rows added to its indexed Constraints
+    (the lazy line loading and voltage band rows, scaled by their own row
+    factor), changed variable bounds and fixings and the values of the
+    mutable Params (the sweep Params). Removing rows or adding variables or
+    components needs a new ScaledModel.
+
+    Attributes:
+        - optim: the solver
+        - m: the pyomo model
+        - scaled: the scaled copy of m
+    """
+
+    def __init__(self, optim, m, passes=4):
+        self.optim = optim
+        self.m = m
+        self.scaled = scale_model(m, passes)
+        names = self.scaled.scaled_component_to_original_name_map
+        # original component -> scaled component
+        self._components = ComponentMap(
+            (m.find_component(names[component]), component)
+            for component in names)
+        self._params = [(param, self.scaled.find_component(param.name))
+                        for param in m.component_objects(pyomo.Param,
+                                                         descend_into=True)
+                        if param.mutable]
+
+    def solve(self, **kwargs):
+        """Push the changes of the model since the last solve, solve the
+        scaled copy and load its unscaled solution into the model.
+
+        Args:
+            - kwargs: options of optim.solve, e.g. tee, warmstart
+
+        Returns:
+            the solver results
+        """
+        self.update()
+        result = self.optim.solve(self.scaled, **kwargs)
+        unscale_solution(self.scaled, self.m)
+        return result
+
+    def update(self):
+        """Push the changes of the model since the last solve to the scaled
+        copy.
+
+        Returns:
+            number of added rows
+        """
+        factors = self.scaled.component_scaling_factor_map
+        for param, scaled in self._params:
+            scaled.store_values({index: data.value
+                                 for index, data in param.items()})
+
+        for var in self.m.component_data_objects(pyomo.Var,
+                                                 descend_into=True):
+            scaled = self.scaled_var(var)
+            factor = factors[scaled]
+            bounds = tuple(None if bound is None else bound * factor
+                           for bound in (var.lb, var.ub))
+            if (scaled.lb, scaled.ub) != bounds:
+                scaled.setlb(bounds[0])
+                scaled.setub(bounds[1])
+            if var.fixed != scaled.fixed:
+                if var.fixed:
+                    scaled.fix(var.value * factor)
+                else:
+                    scaled.unfix()
+
+        added = 0
+        for con in self.m.component_objects(pyomo.Constraint,
+                                            descend_into=True):
+            scaled = self._components[con]
+            if len(scaled) == len(con):
+                continue
+            for index, data in con.items():
+                if index in scaled:
+                    continue
+                if index not in scaled.index_set():
+                    scaled.index_set().add(index)
+                factor, row = self.scaled_row(data)
+                scaled[index] = row
+                factors[scaled[index]] = factor
+                added += 1
+        return added
+
+    def scaled_var(self, var):
+        return self._components[var.parent_component()][var.index()]
+
+    def scaled_row(self, row):
+        """Row factor and (lower, body, upper) of row in the variables of
+        the scaled copy, multiplied by the row factor of its scaled
+        coefficients."""
+        factors = self.scaled.component_scaling_factor_map
+        substitution = {}
+        for var in identify_variables(row.body):
+            scaled = self.scaled_var(var)
+            substitution[id(var)] = scaled / factors[scaled]
+        body = replace_expressions(row.body, substitution_map=substitution,
+                                   descend_into_named_expressions=True,
+                                   remove_named_expressions=True)
+        repn = generate_standard_repn(body, quadratic=False)
+        factor = row_factor(repn.linear_coefs) if repn.is_linear() else 1.0
+        lower, upper = (None if bound is None else bound * factor
+                        for bound in (row.lower, row.upper))
+        if row.equality:
+            return factor, (lower, factor * body)
+        return factor, (lower, factor * body, upper)